@@ -1,6 +1,9 @@
 import click
+import multiprocessing
 
 from arkmod.vcs import attach_endpoints as vcs_attach_endpoints
+from arkmod.assets import attach_endpoints as assets_attach_endpoints
+from arkmod.daemon import daemon
 
 def arkmod_command(name: str, required_args, options, flags):
     
@@ -18,6 +21,10 @@ def cli():
     pass
 
 vcs_attach_endpoints(cli)
+assets_attach_endpoints(cli)
+cli.add_command(daemon)
 
 if __name__ == "__main__":
+    # Worker processes of the frozen executable must run the work they are given rather than the CLI
+    multiprocessing.freeze_support()
     cli()
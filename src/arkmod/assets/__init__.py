@@ -0,0 +1,8 @@
+
+from . import assets
+
+
+def attach_endpoints(cli: callable):
+    cli.add_command(assets.index)
+    cli.add_command(assets.lint)
+    cli.add_command(assets.umap)
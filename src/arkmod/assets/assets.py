@@ -0,0 +1,254 @@
+import time
+import click
+
+from .index import LevelIndex, DEFAULT_INDEX, get_mod_levels
+from .lint import find_schema, load_schema, lint_levels
+from .diff import diff_levels, format_changes
+from .patch import patch_levels, undo_patches, DEFAULT_JOURNAL
+from .extract import extract_levels, expand_levels
+from .exporter import iter_records, write_jsonl, write_columnar
+from ..vcs.arkconfig import pass_arkmod_data
+from ..console import log_error, log_info
+
+
+@click.group("index")
+def index():
+    """Build and query a searchable index of every level in every mod
+    """
+
+@index.command("build")
+@click.option("--database", '-db',
+                default=DEFAULT_INDEX,
+                help="Path to the SQLite index database")
+@pass_arkmod_data()
+def index_build(database: str,
+                arkmod_data: dict):
+    """Load the names, exports and actor properties of every level of every registered mod into the index. Only levels
+    whose contents have changed since the last build are read again.
+    """
+    start = time.perf_counter()
+    with LevelIndex(database) as level_index:
+        updated, unchanged, removed = level_index.build(get_mod_levels(arkmod_data))
+    log_info(f"Indexed {updated} levels ({unchanged} unchanged, {removed} removed) in {time.perf_counter() - start:.2f}s")
+
+@index.command("query")
+@click.option("--class", '-c', "class_name",
+                default=None,
+                help="Only list actors of this class, e.g. SpawnZone")
+@click.option("--property", '-p', "property_name",
+                default=None,
+                help="Only list actors that set this property, e.g. bOnlyCountLandDinos")
+@click.option("--value", '-v',
+                default=None,
+                help="Only list actors whose property has this value. Use true / false for bool properties")
+@click.option("--database", '-db',
+                default=DEFAULT_INDEX,
+                help="Path to the SQLite index database")
+def index_query(class_name: str,
+                property_name: str,
+                value: str,
+                database: str):
+    """List the actors in every indexed level that match the given class, property and value
+    """
+    if value is not None and value.lower() in ("true", "false"):
+        value = int(value.lower() == "true")
+
+    with LevelIndex(database) as level_index:
+        for mod, path, actor in level_index.query(class_name, property_name, value):
+            click.echo(f"{mod}: {path}: {actor}")
+
+
+@click.command("lint")
+@click.argument("mods", nargs=-1)
+@click.option("--schema", '-s',
+                default=None,
+                help="Path to the component schema to check levels against, in the format of docs/settings.json. Defaults to settings.json in the current directory, falling back to the schema shipped with arkmod")
+@click.option("--workers", '-j',
+                type=int,
+                default=None,
+                help="Number of levels to check in parallel. Defaults to the number of CPUs")
+@pass_arkmod_data()
+def lint(mods: tuple[str],
+            schema: str,
+            workers: int,
+            arkmod_data: dict):
+    """Check the actor properties of every level in the given mods against the component schema, exiting with a
+    non-zero status if any problems are found.
+
+    MODS are the names of the mods to check. Checks every registered mod if none are given.
+    """
+    levels = get_mod_levels(arkmod_data)
+    if (unknown := [mod for mod in mods if mod not in levels]):
+        log_error(f"{', '.join(unknown)} are not registered mods. See arkmod list-mods for the available mods.")
+        raise click.exceptions.Exit(1)
+
+    schema = find_schema(schema)
+    try:
+        rules = load_schema(schema)
+    except (OSError, ValueError) as e:
+        log_error(f"Could not load the schema {schema}: {e}")
+        raise click.exceptions.Exit(1)
+
+    paths = [path for mod in (mods or levels) for path in levels[mod]]
+    errors = lint_levels(paths, rules, workers)
+
+    for path, actor, prop, error in errors:
+        log_error(f"{path}: {actor}.{prop}: {error}")
+    log_info(f"Checked {len(paths)} levels, found {len(errors)} problems")
+
+    if errors:
+        raise click.exceptions.Exit(1)
+
+
+@click.group("umap")
+def umap():
+    """Inspect and compare .umap levels
+    """
+
+@umap.command("diff")
+@click.argument("old", type=click.Path(exists=True, dir_okay=False))
+@click.argument("new", type=click.Path(exists=True, dir_okay=False))
+def umap_diff(old: str,
+                new: str):
+    """Compare two versions of a level export by export, listing the exports that were added (+), removed (-) or
+    changed (~) along with the properties that changed.
+    """
+    click.echo(f"--- {old}\n+++ {new}")
+    for line in format_changes(diff_levels(old, new)):
+        click.echo(line)
+
+@umap.command("git-diff", context_settings={"ignore_unknown_options": True})
+@click.argument("path")
+@click.argument("old_file")
+@click.argument("old_hex")
+@click.argument("old_mode")
+@click.argument("new_file")
+@click.argument("new_hex")
+@click.argument("new_mode")
+def umap_git_diff(path: str,
+                    old_file: str,
+                    old_hex: str,
+                    old_mode: str,
+                    new_file: str,
+                    new_hex: str,
+                    new_mode: str):
+    """External git diff driver for levels. Enable it with
+
+    git config diff.umap.command "arkmod umap git-diff"
+
+    and a line '*.umap diff=umap' in .gitattributes.
+    """
+    click.echo(f"diff --arkmod a/{path} b/{path}\n--- a/{path} {old_hex[:7]}\n+++ b/{path} {new_hex[:7]}")
+    for line in format_changes(diff_levels(old_file, new_file)):
+        click.echo(line)
+
+
+@umap.command("patch")
+@click.argument("property_name")
+@click.argument("value")
+@click.argument("levels", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--actor", '-a',
+                default=None,
+                help="Only patch the actor with this object name, e.g. SpawnZone_0")
+@click.option("--class", '-c', "class_name",
+                default=None,
+                help="Only patch actors of this class, e.g. SpawnZone")
+@click.option("--dry-run", '-n',
+                is_flag=True,
+                help="List the changes that would be made without writing them")
+@click.option("--journal", '-j',
+                default=DEFAULT_JOURNAL,
+                help="File recording every change so it can be undone with 'arkmod umap undo'")
+def umap_patch(property_name: str,
+                value: str,
+                levels: tuple[str],
+                actor: str,
+                class_name: str,
+                dry_run: bool,
+                journal: str):
+    """Set PROPERTY_NAME to VALUE in place in every matching actor of LEVELS. Only fixed size values (bools, numbers
+    and names already in the level's name table) can be patched.
+    """
+    try:
+        patches = patch_levels(list(levels), property_name, value, actor=actor, class_name=class_name, dry_run=dry_run, journal=journal)
+    except ValueError as e:
+        log_error(str(e))
+        raise click.exceptions.Exit(1)
+
+    for patch in patches:
+        click.echo(f"{patch.path}: {patch.actor}.{patch.prop}: {patch.old.hex()} -> {patch.new.hex()}")
+    log_info(f"{'Would patch' if dry_run else 'Patched'} {len(patches)} properties in {len({p.path for p in patches})} levels")
+
+@umap.command("undo")
+@click.option("--journal", '-j',
+                default=DEFAULT_JOURNAL,
+                help="The journal of changes to undo")
+def umap_undo(journal: str):
+    """Undo every change recorded in the patch journal
+    """
+    undone, skipped = undo_patches(journal)
+    for patch in skipped:
+        log_error(f"{patch.path}: {patch.actor}.{patch.prop} has changed since it was patched and was not restored")
+    log_info(f"Restored {len(undone)} properties")
+
+
+@umap.command("extract")
+@click.argument("levels", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--output", '-o',
+                default="extracted",
+                help="Directory to extract into")
+@click.option("--filter", '-f', "patterns",
+                multiple=True,
+                help="Only extract exports whose object name matches this glob pattern, e.g. 'SpawnZone*'. Can be given more than once")
+@click.option("--workers", '-j',
+                type=int,
+                default=None,
+                help="Number of exports to copy at once")
+def umap_extract(levels: tuple[str],
+                    output: str,
+                    patterns: tuple[str],
+                    workers: int):
+    """Dump the import and export tables and the raw payload of every export of LEVELS, which may be levels or mod
+    directories. Each payload is written to OUTPUT/<level>/<export>.bin, nested in a directory per outer export, where
+    <level> is the path of the level within the directory it was found in.
+    """
+    start = time.perf_counter()
+    written = extract_levels(list(levels), output, list(patterns) or None, workers)
+    log_info(f"Extracted {len(written)} exports in {time.perf_counter() - start:.2f}s")
+
+
+@umap.command("export")
+@click.argument("levels", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--output", '-o',
+                default="-",
+                help="File to write JSON Lines to, or directory for the columnar format. Defaults to stdout")
+@click.option("--format", '-f', "format_",
+                type=click.Choice(["jsonl", "columnar"]),
+                default="jsonl",
+                help="Write JSON Lines, or NumPy row groups per table (requires NumPy)")
+@click.option("--row-group-size",
+                type=int,
+                default=65536,
+                help="Rows buffered per table before being written in the columnar format")
+def umap_export(levels: tuple[str],
+                output: str,
+                format_: str,
+                row_group_size: int):
+    """Stream the names, imports, exports and actor properties of LEVELS, which may be levels or mod directories,
+    for external analysis.
+    """
+    records = iter_records(expand_levels(list(levels)))
+
+    if format_ == "columnar":
+        if output == "-":
+            return log_error("An output directory must be given with --output for the columnar format.")
+        try:
+            count = write_columnar(records, output, row_group_size)
+        except ImportError as e:
+            return log_error(str(e))
+    else:
+        with click.open_file(output, "w") as out:
+            count = write_jsonl(records, out)
+
+    if output != "-":
+        log_info(f"Exported {count} records to {output}")
@@ -0,0 +1,122 @@
+import os
+import mmap
+import hashlib
+
+from ..umap import ArkPackage, UmapActor
+
+
+class LevelSnapshot:
+
+    def __init__(self, path: str | None) -> None:
+        """Hashes the payload of every export of a level, indexed by its path of object names from the outermost export
+        down, e.g. `PersistentLevel_0/Volume_0/BrushComponent0_0`, so two versions can be compared without decoding
+        anything. Object names are only unique within their outer, so the name alone is not enough.
+
+        Parameters
+        ----------
+        path : str | None
+            The level to read. `None` or a missing file is treated as an empty level, as git passes for added and deleted files
+        """
+        self.path = path
+        self.package = None
+        self.mm = None
+        self.exports = {}
+        self.hashes: dict[str, bytes] = {}
+
+        if not path or not os.path.isfile(path) or not os.path.getsize(path):
+            return
+
+        self.package = ArkPackage(path)
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        with memoryview(self.mm) as view:
+            for export in self.package.exports:
+                name = "/".join(self.package.get_export_path(export))
+                self.exports[name] = export
+                self.hashes[name] = hashlib.blake2b(view[export.offset:export.offset + export.size], digest_size=16).digest()
+
+    def read_properties(self, name: str) -> dict[tuple[str, int], object]:
+        """Decodes the properties of a single export, using the raw bytes of any value that is not understood
+        """
+        export = self.exports[name]
+        actor = UmapActor(export, self.mm)
+        return {
+            (prop.name, prop.array_index): prop.value if prop.value is not None else self.mm[prop.offset:prop.offset + prop.size]
+            for prop in actor.properties
+        }
+
+    def close(self) -> None:
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+class ExportChange:
+    """A single export that differs between two versions of a level
+    """
+
+    ADDED = "+"
+    REMOVED = "-"
+    CHANGED = "~"
+
+    def __init__(self, name: str, kind: str, properties: dict[tuple[str, int], tuple] | None = None) -> None:
+        self.name = name
+        self.kind = kind
+        # (property, array index) -> (old value, new value), with None for a property that is not set
+        self.properties = properties or {}
+
+    def __repr__(self) -> str:
+        return f"ExportChange({self.kind} {self.name}, {self.properties})"
+
+
+def diff_properties(old: dict, new: dict) -> dict[tuple[str, int], tuple]:
+    return {
+        key: (old.get(key), new.get(key))
+        for key in list(old) + [k for k in new if k not in old]
+        if old.get(key) != new.get(key)
+    }
+
+def diff_snapshots(old: LevelSnapshot, new: LevelSnapshot) -> list[ExportChange]:
+    """Compares two versions of a level export by export, only decoding the exports whose payload hashes differ
+
+    Returns
+    -------
+    list[ExportChange]
+        The exports that were added, removed or changed, in the order they appear in the levels
+    """
+    changes = []
+    for name, hash_ in old.hashes.items():
+        if name not in new.hashes:
+            changes.append(ExportChange(name, ExportChange.REMOVED))
+        elif new.hashes[name] != hash_:
+            changes.append(ExportChange(name, ExportChange.CHANGED, diff_properties(old.read_properties(name), new.read_properties(name))))
+
+    changes.extend(ExportChange(name, ExportChange.ADDED) for name in new.hashes if name not in old.hashes)
+    return changes
+
+def diff_levels(old: str | None, new: str | None) -> list[ExportChange]:
+    with LevelSnapshot(old) as old_snapshot, LevelSnapshot(new) as new_snapshot:
+        return diff_snapshots(old_snapshot, new_snapshot)
+
+def format_value(value) -> str:
+    if value is None:
+        return "<unset>"
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes: {value[:16].hex()}{'...' * (len(value) > 16)}>"
+    return str(value)
+
+def format_changes(changes: list[ExportChange]) -> list[str]:
+    lines = []
+    for change in changes:
+        lines.append(f"{change.kind} {change.name}")
+        for (prop, array_index), (old, new) in change.properties.items():
+            prop = f"{prop}[{array_index}]" if array_index else prop
+            lines.append(f"    {prop}: {format_value(old)} -> {format_value(new)}")
+    return lines
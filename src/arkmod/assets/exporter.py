@@ -0,0 +1,152 @@
+import os
+import json
+from typing import Iterator, TextIO
+
+from ..umap import ArkPackage, UmapActor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Columns of every table, along with whether they hold integers or strings in the columnar format
+TABLES: dict[str, dict[str, type]] = {
+    "names": {"level": str, "index": int, "name": str},
+    "imports": {"level": str, "index": int, "object_name": str, "class": str, "package": str, "outer": int},
+    "exports": {"level": str, "index": int, "object_name": str, "class": str, "outer": int, "offset": int, "size": int},
+    "properties": {"level": str, "export": int, "name": str, "type": str, "array_index": int, "offset": int, "size": int, "value": str},
+}
+
+
+def iter_level_records(path: str) -> Iterator[tuple[str, dict]]:
+    """Lazily yields the names, imports, exports and actor properties of a level, one row at a time
+
+    Only the tables of the level are held in memory, the properties of each export are read as they are yielded.
+
+    Returns
+    -------
+    Iterator[tuple[str, dict]]
+        The table each row belongs to, see `TABLES`, and the row itself
+    """
+    package = ArkPackage(path)
+
+    for i, name in enumerate(package.names):
+        yield "names", {"level": path, "index": i, "name": name}
+
+    for i, imp in enumerate(package.imports):
+        top = package.get_import_package(imp)
+        yield "imports", {
+            "level": path,
+            "index": i,
+            "object_name": imp.get_object_name(),
+            "class": imp.name(imp.class_name),
+            "package": top.name(top.object_name),
+            "outer": imp.outer_index
+        }
+
+    with open(path, "rb") as f:
+        for i, export in enumerate(package.exports):
+            yield "exports", {
+                "level": path,
+                "index": i,
+                "object_name": export.get_object_name(),
+                "class": package.get_export_class(export),
+                "outer": export.outer_index,
+                "offset": export.offset,
+                "size": export.size
+            }
+            for prop in UmapActor(export, f).properties:
+                yield "properties", {
+                    "level": path,
+                    "export": i,
+                    "name": prop.name,
+                    "type": prop.type,
+                    "array_index": prop.array_index,
+                    "offset": prop.offset,
+                    "size": prop.size,
+                    "value": prop.value
+                }
+
+def iter_records(paths: list[str]) -> Iterator[tuple[str, dict]]:
+    for path in paths:
+        yield from iter_level_records(path)
+
+def write_jsonl(records: Iterator[tuple[str, dict]], out: TextIO) -> int:
+    """Writes each record as a line of JSON tagged with its table, returning the number of records written
+    """
+    count = 0
+    for table, row in records:
+        out.write(json.dumps({"table": table, **row}) + "\n")
+        count += 1
+    return count
+
+
+class ColumnarWriter:
+
+    def __init__(self, output_dir: str, row_group_size: int = 65536) -> None:
+        """Writes records as a directory of column-oriented row groups, one `<table>/part-<n>.npz` file of NumPy arrays
+        per `row_group_size` rows, so memory use is bounded by the size of a row group rather than the data set
+
+        Parameters
+        ----------
+        output_dir : str
+            Directory to write the tables into
+        row_group_size : int, optional
+            Maximum number of rows buffered per table before they are written out, by default 65536
+
+        Raises
+        ------
+        ImportError
+            If NumPy is not installed
+        """
+        if np is None:
+            raise ImportError("NumPy must be installed to export levels in the columnar format. Use JSON Lines instead.")
+
+        self.output_dir = output_dir
+        self.row_group_size = max(1, row_group_size)
+        self.buffers: dict[str, list[dict]] = {table: [] for table in TABLES}
+        self.row_groups: dict[str, int] = {table: 0 for table in TABLES}
+
+    def add(self, table: str, row: dict) -> None:
+        self.buffers[table].append(row)
+        if len(self.buffers[table]) >= self.row_group_size:
+            self.flush(table)
+
+    def flush(self, table: str) -> None:
+        if not (rows := self.buffers[table]):
+            return
+
+        columns = {}
+        for column, kind in TABLES[table].items():
+            if kind is int:
+                columns[column] = np.fromiter((row[column] for row in rows), dtype=np.int64, count=len(rows))
+            elif column == "value":
+                columns[column] = np.array([json.dumps(row[column]) for row in rows], dtype=str)
+            else:
+                columns[column] = np.array(["" if row[column] is None else row[column] for row in rows], dtype=str)
+
+        table_dir = os.path.join(self.output_dir, table)
+        os.makedirs(table_dir, exist_ok=True)
+        np.savez(os.path.join(table_dir, f"part-{self.row_groups[table]:05d}.npz"), **columns)
+
+        self.row_groups[table] += 1
+        self.buffers[table] = []
+
+    def close(self) -> None:
+        for table in TABLES:
+            self.flush(table)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+def write_columnar(records: Iterator[tuple[str, dict]], output_dir: str, row_group_size: int = 65536) -> int:
+    count = 0
+    with ColumnarWriter(output_dir, row_group_size) as writer:
+        for table, row in records:
+            writer.add(table, row)
+            count += 1
+    return count
@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+from fnmatch import fnmatchcase
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from ..umap import ArkPackage, ArkExport, copy_byte_range, dump_umap_import_exports
+from .resolver import find_packages
+
+UNSAFE_CHARACTERS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+# Levels held open at once while their exports are copied, keeping well clear of the open file limit
+MAX_OPEN_LEVELS = 64
+
+
+def expand_levels(paths: list[str]) -> list[str]:
+    """Expands any directories in `paths` into the packages they contain
+    """
+    return [level for path in paths for level in (find_packages(path) if os.path.isdir(path) else [path])]
+
+def expand_level_names(paths: list[str]) -> list[tuple[str, str]]:
+    """Expands any directories in `paths` into the packages they contain, along with a name for each package made of its
+    path relative to the parent of the directory it was found in, without the extension
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        The path and name of each package, e.g. `(Mods/GenericMod/Maps/Cave.umap, GenericMod/Maps/Cave)`
+    """
+    levels = []
+    for path in paths:
+        if not os.path.isdir(path):
+            levels.append((path, os.path.splitext(os.path.basename(path))[0]))
+            continue
+        root = os.path.dirname(os.path.abspath(path))
+        levels.extend((level, os.path.splitext(os.path.relpath(os.path.abspath(level), root))[0]) for level in find_packages(path))
+    return levels
+
+def matches(name: str, patterns: list[str] | None) -> bool:
+    return not patterns or any(fnmatchcase(name, pattern) for pattern in patterns)
+
+def extract_export(src_fd: int, export: ArkExport, dest: str) -> str:
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with open(dest, "wb") as out:
+        copy_byte_range(src_fd, out.fileno(), export.offset, export.size)
+    return dest
+
+class LevelSource:
+
+    def __init__(self, path: str, slots: threading.Semaphore) -> None:
+        """An open level whose exports are being copied, closed as soon as the last of its copies is done. Each one
+        takes a slot for as long as it is open, which bounds how many levels are open at once.
+        """
+        slots.acquire()
+        self.slots = slots
+        self.fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        self.remaining = 0
+        self.lock = threading.Lock()
+
+    def close_when_done(self, futures: list[Future]) -> None:
+        if not futures:
+            return self.close()
+        self.remaining = len(futures)
+        for future in futures:
+            future.add_done_callback(self.copy_done)
+
+    def copy_done(self, _: Future) -> None:
+        with self.lock:
+            self.remaining -= 1
+            last = self.remaining == 0
+        if last:
+            self.close()
+
+    def close(self) -> None:
+        os.close(self.fd)
+        self.slots.release()
+
+
+def extract_level(path: str, level_dir: str, pool: ThreadPoolExecutor, slots: threading.Semaphore, patterns: list[str] | None = None) -> list[Future]:
+    """Queues the payload of every matching export of a level to be copied into `level_dir`, nested in directories
+    named after the exports they are within. The level is closed once every copy is done.
+
+    Returns
+    -------
+    list[Future]
+        The queued copies
+    """
+    package = ArkPackage(path)
+    os.makedirs(level_dir, exist_ok=True)
+    dump_umap_import_exports(path, level_dir)
+
+    jobs = []
+    for export in package.exports:
+        if not matches(export.get_object_name(), patterns):
+            continue
+        parts = [UNSAFE_CHARACTERS.sub("_", part) for part in package.get_export_path(export)]
+        jobs.append((export, os.path.join(level_dir, *parts[:-1], f"{parts[-1]}.bin")))
+
+    source = LevelSource(path, slots)
+    futures = []
+    try:
+        for export, dest in jobs:
+            futures.append(pool.submit(extract_export, source.fd, export, dest))
+    finally:
+        source.close_when_done(futures)
+    return futures
+
+def extract_levels(paths: list[str], output_dir: str, patterns: list[str] | None = None, workers: int | None = None) -> list[str]:
+    """Dumps the raw payload of every matching export of every level, copying on a thread pool shared across all of
+    the exports of all of the levels
+
+    Parameters
+    ----------
+    paths : list[str]
+        Levels, or directories of levels, to extract
+    output_dir : str
+        Directory to extract into, with one sub directory per level named after its path within the directory it was
+        found in, so levels with the same name in different directories or mods are kept apart
+    patterns : list[str] | None, optional
+        Glob patterns matched against export object names, e.g. `SpawnZone*`. Extracts every export if not specified, by default None
+    workers : int | None, optional
+        The number of copying threads, by default None
+
+    Returns
+    -------
+    list[str]
+        The paths of every file written
+    """
+    slots = threading.Semaphore(MAX_OPEN_LEVELS)
+    futures = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for level, name in expand_level_names(paths):
+            futures.extend(extract_level(level, os.path.join(output_dir, name), pool, slots, patterns))
+        return [future.result() for future in futures]
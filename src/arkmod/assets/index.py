@@ -0,0 +1,233 @@
+import os
+import sqlite3
+import hashlib
+
+from ..umap import ArkPackage, UmapActor
+from .resolver import find_packages
+
+DEFAULT_INDEX = ".arkmod-index.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    mod TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS names (
+    file_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    name TEXT,
+    PRIMARY KEY (file_id, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS exports (
+    file_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    object_name TEXT NOT NULL,
+    class TEXT,
+    offset INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (file_id, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS properties (
+    file_id INTEGER NOT NULL,
+    export_idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    array_index INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    value NUMERIC
+);
+CREATE INDEX IF NOT EXISTS names_name ON names (name);
+CREATE INDEX IF NOT EXISTS exports_class ON exports (class, object_name);
+CREATE INDEX IF NOT EXISTS exports_object_name ON exports (object_name);
+CREATE INDEX IF NOT EXISTS properties_name ON properties (name, value);
+CREATE INDEX IF NOT EXISTS properties_file ON properties (file_id, export_idx);
+"""
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hashes the contents of a file in chunks so large levels are never held in memory at once
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_mod_levels(arkmod_data: dict) -> dict[str, list[str]]:
+    """Gets the paths of every level within every mod registered in the .arkmod config
+
+    Returns
+    -------
+    dict[str, list[str]]
+        Mapping of mod name to the .umap files within the mod directory
+    """
+    return {
+        mod: [p for p in find_packages(os.path.join("Mods", data["directory"])) if p.lower().endswith(".umap")]
+        for mod, data in arkmod_data["mods"].items()
+    }
+
+def read_level_rows(path: str) -> tuple[list, list, list]:
+    """Parses a level into the rows stored for it in the index
+
+    Returns
+    -------
+    tuple[list, list, list]
+        The name, export and property rows of the level, without their file id
+    """
+    package = ArkPackage(path)
+
+    names = list(enumerate(package.names))
+    exports = []
+    properties = []
+
+    with open(path, "rb") as f:
+        for i, export in enumerate(package.exports):
+            exports.append((i, export.get_object_name(), package.get_export_class(export), export.offset, export.size))
+            for prop in UmapActor(export, f).properties:
+                value = prop.value if isinstance(prop.value, (bool, int, float, str)) else None
+                properties.append((i, prop.name, prop.type, prop.array_index, prop.offset, prop.size, value))
+
+    return names, exports, properties
+
+
+class LevelIndex:
+
+    def __init__(self, path: str = DEFAULT_INDEX) -> None:
+        """SQLite database holding the names, exports and actor properties of every level in every mod
+
+        Parameters
+        ----------
+        path : str, optional
+            Path to the database file, which is created if it does not exist, by default DEFAULT_INDEX
+        """
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def get_hashes(self) -> dict[str, tuple[int, str]]:
+        return {path: (file_id, hash_) for file_id, path, hash_ in self.db.execute("SELECT id, path, hash FROM files")}
+
+    def remove_file(self, file_id: int) -> None:
+        for table in ("names", "exports", "properties"):
+            self.db.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+        self.db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def add_file(self, mod: str, path: str, hash_: str, rows: tuple[list, list, list] | None = None) -> None:
+        names, exports, properties = rows or read_level_rows(path)
+
+        file_id = self.db.execute("INSERT INTO files (mod, path, hash) VALUES (?, ?, ?)", (mod, path, hash_)).lastrowid
+        self.db.executemany("INSERT INTO names VALUES (?, ?, ?)", ((file_id, *row) for row in names))
+        self.db.executemany("INSERT INTO exports VALUES (?, ?, ?, ?, ?, ?)", ((file_id, *row) for row in exports))
+        self.db.executemany("INSERT INTO properties VALUES (?, ?, ?, ?, ?, ?, ?, ?)", ((file_id, *row) for row in properties))
+
+    def refresh(self, mod: str, path: str) -> bool:
+        """Brings a single level up to date, removing it from the index if it no longer exists
+
+        Returns
+        -------
+        bool
+            `True` if the index changed else `False`
+        """
+        row = self.db.execute("SELECT id, hash FROM files WHERE path = ?", (path,)).fetchone()
+        if not os.path.isfile(path):
+            if row is not None:
+                with self.db:
+                    self.remove_file(row[0])
+            return row is not None
+
+        hash_ = hash_file(path)
+        if row is not None and row[1] == hash_:
+            return False
+
+        # The level is read before the write transaction starts, so readers and other writers are only held up for the inserts
+        rows = read_level_rows(path)
+        with self.db:
+            # Look the level up again, as another connection may have refreshed it in the meantime
+            if (row := self.db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()) is not None:
+                self.remove_file(row[0])
+            self.add_file(mod, path, hash_, rows)
+        return True
+
+    def build(self, levels: dict[str, list[str]]) -> tuple[int, int, int]:
+        """Brings the index up to date with the given levels, only re-reading levels whose contents have changed
+
+        Parameters
+        ----------
+        levels : dict[str, list[str]]
+            Mapping of mod name to the paths of its levels, as returned by `get_mod_levels`
+
+        Returns
+        -------
+        tuple[int, int, int]
+            The number of levels that were added or updated, left unchanged and removed
+        """
+        known = self.get_hashes()
+        updated = unchanged = 0
+
+        with self.db:
+            for mod, paths in levels.items():
+                for path in paths:
+                    hash_ = hash_file(path)
+                    file_id, old_hash = known.pop(path, (None, None))
+                    if old_hash == hash_:
+                        unchanged += 1
+                        continue
+                    if file_id is not None:
+                        self.remove_file(file_id)
+                    self.add_file(mod, path, hash_)
+                    updated += 1
+
+            # Anything left over no longer exists in any mod
+            for file_id, _ in known.values():
+                self.remove_file(file_id)
+
+        return updated, unchanged, len(known)
+
+    def query(self, class_name: str | None = None, property_name: str | None = None, value=None) -> list[tuple[str, str, str]]:
+        """Finds every actor matching the given class, property and property value
+
+        Parameters
+        ----------
+        class_name : str | None, optional
+            Only match actors of this class, by default None
+        property_name : str | None, optional
+            Only match actors with this property set, by default None
+        value : optional
+            Only match actors whose property has this value, by default None
+
+        Returns
+        -------
+        list[tuple[str, str, str]]
+            The mod, level path and actor name of every match
+        """
+        sql = "SELECT DISTINCT f.mod, f.path, e.object_name FROM exports e JOIN files f ON f.id = e.file_id"
+        conditions, params = [], []
+
+        if property_name is not None:
+            sql += " JOIN properties p ON p.file_id = e.file_id AND p.export_idx = e.idx"
+            conditions.append("p.name = ?")
+            params.append(property_name)
+            if value is not None:
+                conditions.append("p.value = ?")
+                params.append(value)
+        if class_name is not None:
+            conditions.append("e.class = ?")
+            params.append(class_name)
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return self.db.execute(sql + " ORDER BY f.mod, f.path, e.object_name", params).fetchall()
@@ -0,0 +1,155 @@
+import os
+import json
+from numbers import Number
+from concurrent.futures import ProcessPoolExecutor
+
+from ..umap import ArkPackage, UmapActor
+
+# The schema shipped with arkmod, used when the repository does not have one of its own
+DEFAULT_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
+
+
+class PropertyRule:
+
+    def __init__(self, name: str, rule: dict | str) -> None:
+        """A compiled check for a single property of a component in the schema
+
+        Parameters
+        ----------
+        name : str
+            Name of the property
+        rule : dict | str
+            The schema entry for the property. This is either just a description, or an object optionally containing
+            the expected `type`, the `min` / `max` of a numeric value, the allowed `values` and whether it is `required`
+        """
+        if isinstance(rule, str):
+            rule = {"description": rule}
+
+        self.name = name
+        self.description = rule.get("description", "")
+        self.type = rule.get("type")
+        self.min = rule.get("min")
+        self.max = rule.get("max")
+        self.values = rule.get("values")
+        self.required = rule.get("required", False)
+
+    def needs_value(self) -> bool:
+        return self.min is not None or self.max is not None or self.values is not None
+
+    def is_checked(self) -> bool:
+        return self.type is not None or self.required or self.needs_value()
+
+    def validate(self, prop) -> list[str]:
+        if self.type is not None and prop.type != self.type:
+            return [f"expected {self.type} but found {prop.type}"]
+
+        errors = []
+        if self.values is not None and prop.value not in self.values:
+            errors.append(f"{prop.value} is not one of {self.values}")
+        if (self.min is not None or self.max is not None) and prop.value is not None and not isinstance(prop.value, Number):
+            return errors + [f"{prop.value!r} is not a number"]
+        if self.min is not None and prop.value is not None and prop.value < self.min:
+            errors.append(f"{prop.value} is less than the minimum of {self.min}")
+        if self.max is not None and prop.value is not None and prop.value > self.max:
+            errors.append(f"{prop.value} is greater than the maximum of {self.max}")
+        return errors
+
+
+class ComponentRules:
+    """The compiled rules of a single component class, with the names of the properties that need decoding worked out
+    ahead of time
+    """
+
+    def __init__(self, name: str, component: dict) -> None:
+        self.name = name
+        self.properties = {
+            prop: rule for prop, data in component.get("sub-components", {}).items()
+            if (rule := PropertyRule(prop, data)).is_checked()
+        }
+        self.decode = {prop for prop, rule in self.properties.items() if rule.needs_value()}
+        self.required = [prop for prop, rule in self.properties.items() if rule.required]
+
+    def validate(self, actor: UmapActor) -> list[tuple[str, str]]:
+        errors = []
+        for prop in actor.properties:
+            if (rule := self.properties.get(prop.name)) is not None:
+                errors.extend((prop.name, error) for error in rule.validate(prop))
+        errors.extend((prop, "required property is not set") for prop in self.required if prop not in actor.components)
+        return errors
+
+
+def compile_schema(schema: dict) -> dict[str, ComponentRules]:
+    """Compiles a component schema, such as docs/settings.json, into rules for each component class that has something
+    to check
+    """
+    compiled = {name: ComponentRules(name, component) for name, component in schema.items()}
+    return {name: rules for name, rules in compiled.items() if rules.properties}
+
+def find_schema(path: str | None = None) -> str:
+    """Resolves the schema to lint against, preferring a settings.json in the current directory over the shipped one
+    """
+    if path is not None:
+        return path
+    return "settings.json" if os.path.isfile("settings.json") else DEFAULT_SCHEMA
+
+def load_schema(path: str) -> dict[str, ComponentRules]:
+    with open(path, "r") as f:
+        return compile_schema(json.load(f))
+
+def lint_level(path: str, rules: dict[str, ComponentRules]) -> list[tuple[str, str, str, str]]:
+    """Checks every actor within a level whose class has rules in the schema
+
+    Returns
+    -------
+    list[tuple[str, str, str, str]]
+        The level, actor, property and message of every problem found
+    """
+    package = ArkPackage(path)
+    errors = []
+
+    with open(path, "rb") as f:
+        for export in package.exports:
+            if (component := rules.get(package.get_export_class(export))) is None:
+                continue
+            actor = UmapActor(export, f, decode=component.decode)
+            errors.extend((path, export.get_object_name(), prop, error) for prop, error in component.validate(actor))
+    return errors
+
+worker_rules: dict[str, ComponentRules] = {}
+
+def set_worker_rules(rules: dict[str, ComponentRules]) -> None:
+    global worker_rules
+    worker_rules = rules
+
+def lint_worker_level(path: str) -> list[tuple[str, str, str, str]]:
+    return lint_level(path, worker_rules)
+
+def lint_levels(paths: list[str], rules: dict[str, ComponentRules], workers: int | None = None) -> list[tuple[str, str, str, str]]:
+    """Lints many levels in parallel across a pool of worker processes
+
+    Parameters
+    ----------
+    paths : list[str]
+        The levels to check
+    rules : dict[str, ComponentRules]
+        The compiled schema to check against
+    workers : int | None, optional
+        The number of worker processes, where 1 checks every level in this process. Uses every CPU if not specified,
+        by default None
+
+    Returns
+    -------
+    list[tuple[str, str, str, str]]
+        The level, actor, property and message of every problem found, in the order of `paths`
+    """
+    if not rules or not paths:
+        return []
+
+    if workers == 1 or len(paths) == 1:
+        results = [lint_level(path, rules) for path in paths]
+    else:
+        # The rules are sent to each worker once when it starts, rather than pickled along with every level
+        with ProcessPoolExecutor(max_workers=workers, initializer=set_worker_rules, initargs=(rules,)) as pool:
+            results = list(pool.map(lint_worker_level, paths))
+
+    return [error for result in results for error in result]
@@ -0,0 +1,247 @@
+import os
+import json
+import mmap
+import struct
+
+from ..umap import ArkPackage, ActorProperty, UmapActor
+from ..vcs.arkconfig import write_json_atomic
+
+DEFAULT_JOURNAL = ".arkmod-patch-journal.jsonl"
+
+
+def parse_bool(value) -> bool:
+    """Converts a bool given on the command line, rejecting anything that is not clearly true or false
+    """
+    if isinstance(value, bool):
+        return value
+    if (text := str(value).lower()) in ("true", "1"):
+        return True
+    if text in ("false", "0"):
+        return False
+    raise ValueError(f"{value} is not a bool, expected true or false")
+
+FIXED_SIZE_TYPES: dict[str, tuple[str, callable]] = {
+    "BoolProperty": ("<?", parse_bool),
+    "IntProperty": ("<i", int),
+    "UInt32Property": ("<I", int),
+    "Int64Property": ("<q", int),
+    "FloatProperty": ("<f", float),
+    "DoubleProperty": ("<d", float),
+    "ObjectProperty": ("<i", int),
+}
+
+
+class PropertyPatch:
+    """A single in place change to the value of a property, holding both the old and new bytes so it can be undone
+    """
+
+    def __init__(self, path: str, actor: str, prop: str, offset: int, old: bytes, new: bytes) -> None:
+        self.path = path
+        self.actor = actor
+        self.prop = prop
+        self.offset = offset
+        self.old = old
+        self.new = new
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "path": self.path,
+            "actor": self.actor,
+            "property": self.prop,
+            "offset": self.offset,
+            "old": self.old.hex(),
+            "new": self.new.hex()
+        })
+
+    @staticmethod
+    def from_json(line: str) -> "PropertyPatch":
+        data = json.loads(line)
+        return PropertyPatch(data["path"], data["actor"], data["property"], data["offset"], bytes.fromhex(data["old"]), bytes.fromhex(data["new"]))
+
+    def __repr__(self) -> str:
+        return f"PropertyPatch({self.path}: {self.actor}.{self.prop} [{self.offset}] {self.old.hex()} -> {self.new.hex()})"
+
+
+def encode_value(package: ArkPackage, prop: ActorProperty, value) -> bytes:
+    """Encodes a new value for a property, ensuring it takes up exactly as many bytes as the value it replaces
+
+    Raises
+    ------
+    ValueError
+        If the property is not of a fixed size type, or the value cannot be stored in it
+    """
+    if prop.type in FIXED_SIZE_TYPES:
+        fmt, convert = FIXED_SIZE_TYPES[prop.type]
+        try:
+            data = struct.pack(fmt, convert(value))
+        except struct.error as e:
+            raise ValueError(f"{value} cannot be stored in {prop.type} {prop.name}: {e}")
+    elif prop.type == "ByteProperty" and prop.size == 1:
+        try:
+            data = struct.pack("<B", int(value))
+        except struct.error as e:
+            raise ValueError(f"{value} cannot be stored in {prop.type} {prop.name}: {e}")
+    elif prop.type == "NameProperty" or prop.type == "ByteProperty":
+        # Names can only be swapped for ones already in the name table, since the table cannot grow in place
+        if value not in package.names:
+            raise ValueError(f"{value} is not in the name table of {package.path}")
+        data = struct.pack("<II", package.names.index(value), 0)
+    else:
+        raise ValueError(f"{prop.type} {prop.name} is not a fixed size property and cannot be patched in place")
+
+    if len(data) != prop.size:
+        raise ValueError(f"{prop.type} {prop.name} is {prop.size} bytes but the new value is {len(data)} bytes")
+    return data
+
+def append_journal(journal: str, patches: list[PropertyPatch]) -> None:
+    """Durably records patches before they are applied so they can always be undone
+    """
+    with open(journal, "a") as f:
+        f.writelines(patch.to_json() + "\n" for patch in patches)
+        f.flush()
+        os.fsync(f.fileno())
+
+def find_patches(path: str,
+                    prop_name: str,
+                    value,
+                    actor: str | None = None,
+                    class_name: str | None = None) -> list[PropertyPatch]:
+    """Works out the changes needed to set a property in a level without writing anything, see `patch_level` for the
+    arguments
+
+    Raises
+    ------
+    ValueError
+        If a matching property cannot hold the new value in place
+    """
+    package = ArkPackage(path)
+    patches = []
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for export in package.exports:
+            if actor is not None and export.get_object_name() != actor:
+                continue
+            if class_name is not None and package.get_export_class(export) != class_name:
+                continue
+
+            for prop in UmapActor(export, mm, decode=set()).properties:
+                if prop.name != prop_name:
+                    continue
+                new = encode_value(package, prop, value)
+                old = mm[prop.offset:prop.offset + prop.size]
+                if old != new:
+                    patches.append(PropertyPatch(path, export.get_object_name(), prop.name, prop.offset, old, new))
+
+    return patches
+
+def apply_patches(path: str, patches: list[PropertyPatch], journal: str = DEFAULT_JOURNAL) -> None:
+    """Writes patches to a level in place through a writable mmap, recording them in the journal first
+    """
+    if not patches:
+        return
+
+    append_journal(journal, patches)
+    with open(path, "r+b") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE) as mm:
+        for patch in patches:
+            mm[patch.offset:patch.offset + len(patch.new)] = patch.new
+        mm.flush()
+
+def patch_level(path: str,
+                prop_name: str,
+                value,
+                actor: str | None = None,
+                class_name: str | None = None,
+                dry_run: bool = False,
+                journal: str = DEFAULT_JOURNAL) -> list[PropertyPatch]:
+    """Rewrites the value of a property in place through a writable mmap, without rewriting the rest of the level
+
+    Parameters
+    ----------
+    path : str
+        The level to patch
+    prop_name : str
+        The name of the property to change
+    value :
+        The new value, either already typed or as a string to be converted to the type of the property
+    actor : str | None, optional
+        Only patch the actor with this object name, e.g. `SpawnZone_0`, by default None
+    class_name : str | None, optional
+        Only patch actors of this class, by default None
+    dry_run : bool, optional
+        Work out the changes without writing them, by default False
+    journal : str, optional
+        File that every applied patch is appended to so it can be undone, by default DEFAULT_JOURNAL
+
+    Returns
+    -------
+    list[PropertyPatch]
+        The changes made, or that would have been made when `dry_run` is set. Properties already set to the value are skipped
+
+    Raises
+    ------
+    ValueError
+        If a matching property cannot hold the new value in place. Nothing is written to the level in this case
+    """
+    patches = find_patches(path, prop_name, value, actor, class_name)
+    if not dry_run:
+        apply_patches(path, patches, journal)
+    return patches
+
+def patch_levels(paths: list[str],
+                    prop_name: str,
+                    value,
+                    actor: str | None = None,
+                    class_name: str | None = None,
+                    dry_run: bool = False,
+                    journal: str = DEFAULT_JOURNAL) -> list[PropertyPatch]:
+    """Patches a property across many levels, see `patch_level` for the arguments. The changes to every level are
+    worked out before any are written, so a value that one level cannot hold leaves every level untouched.
+    """
+    planned = [(path, find_patches(path, prop_name, value, actor, class_name)) for path in paths]
+    if not dry_run:
+        for path, patches in planned:
+            apply_patches(path, patches, journal)
+    return [patch for _, patches in planned for patch in patches]
+
+def undo_patches(journal: str = DEFAULT_JOURNAL) -> tuple[list[PropertyPatch], list[PropertyPatch]]:
+    """Restores the old value of every patch in the journal, most recent first, then removes the journal
+
+    Patches whose level is missing or whose bytes have since been changed by something else are left alone, and are
+    kept in the journal for a later undo.
+
+    Returns
+    -------
+    tuple[list[PropertyPatch], list[PropertyPatch]]
+        The patches that were undone and those that were skipped
+    """
+    if not os.path.isfile(journal):
+        return [], []
+
+    with open(journal, "r") as f:
+        patches = [PropertyPatch.from_json(line) for line in f if line.strip()]
+
+    undone, skipped = [], []
+    by_path: dict[str, list[PropertyPatch]] = {}
+    for patch in reversed(patches):
+        by_path.setdefault(patch.path, []).append(patch)
+
+    for path, level_patches in by_path.items():
+        if not os.path.isfile(path):
+            skipped.extend(level_patches)
+            continue
+        with open(path, "r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+            for patch in level_patches:
+                if mm[patch.offset:patch.offset + len(patch.new)] != patch.new:
+                    skipped.append(patch)
+                    continue
+                mm[patch.offset:patch.offset + len(patch.old)] = patch.old
+                undone.append(patch)
+            mm.flush()
+
+    # Patches that could not be undone stay in the journal so they can be retried once their level is back
+    if skipped:
+        kept = {id(patch) for patch in skipped}
+        write_json_atomic(journal, "".join(patch.to_json() + "\n" for patch in patches if id(patch) in kept))
+    else:
+        os.remove(journal)
+    return undone, skipped
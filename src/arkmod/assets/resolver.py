@@ -0,0 +1,218 @@
+import os
+from collections import OrderedDict
+
+from ..umap import ArkPackage, ArkImport, ArkExport
+
+PACKAGE_EXTENSIONS = (".umap", ".uasset")
+
+
+def get_package_name(path: str) -> str:
+    """Gets the short name of a package, as used to match imports against the files on disk
+
+    Parameters
+    ----------
+    path : str
+        Either a path to a package on disk, or a package path such as `/Game/Mods/GenericMod/GenericMod`
+
+    Returns
+    -------
+    str
+        The name of the package without any directories or file extension
+    """
+    return os.path.splitext(path.replace('\\', '/').rsplit('/', 1)[-1])[0]
+
+def find_packages(directory: str) -> list[str]:
+    """Recursively finds every .umap and .uasset package within a directory
+    """
+    packages = []
+    for root, _, files in os.walk(directory):
+        packages.extend(os.path.join(root, file) for file in sorted(files) if file.lower().endswith(PACKAGE_EXTENSIONS))
+    return packages
+
+
+class PackageCache:
+
+    def __init__(self, max_packages: int = 64) -> None:
+        """Size bounded LRU cache of parsed packages, evicting the least recently used package once full
+
+        Parameters
+        ----------
+        max_packages : int, optional
+            The maximum number of parsed packages held in memory at once, by default 64
+        """
+        self.max_packages = max(1, max_packages)
+        self.packages: OrderedDict[str, ArkPackage] = OrderedDict()
+        self.loads = 0
+
+    def get(self, path: str) -> ArkPackage:
+        if (package := self.packages.get(path)) is not None:
+            self.packages.move_to_end(path)
+            return package
+
+        package = ArkPackage(path)
+        self.loads += 1
+
+        self.packages[path] = package
+        if len(self.packages) > self.max_packages:
+            self.packages.popitem(last=False)
+        return package
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.packages
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+
+class IndexedPackage:
+    """The parts of a package needed to resolve imports into it, kept after the parsed package itself is evicted
+    """
+
+    def __init__(self, package: ArkPackage, key: str) -> None:
+        self.path = package.path
+        self.key = key
+        self.name = get_package_name(package.path)
+
+        # Top level exports win over nested sub-objects sharing the same name
+        self.exports: dict[str, int] = {}
+        for i, export in sorted(enumerate(package.exports), key=lambda e: e[1].outer_index != 0):
+            self.exports.setdefault(export.get_object_name(), i)
+
+        # Full package paths of the packages imported from, e.g. /Game/Mods/GenericMod/PrimalGameData_BP_GenericMod
+        self.dependencies: set[str] = {
+            imp.name(imp.object_name) or "" for imp in package.imports if imp.outer_index == 0
+        } - {""}
+
+
+class PackageResolver:
+
+    def __init__(self, directory: str, max_packages: int = 64) -> None:
+        """Resolves imports to the exports they reference in the other packages of a mod directory.
+
+        Every package within the directory is parsed and indexed exactly once up front, after which parsed packages
+        are only loaded again on demand through a size bounded LRU cache. Packages are indexed by their path within
+        the mod directory, e.g. `Maps/Cave`, which the full package path of an import continues on to, e.g.
+        `/Game/Mods/GenericMod/Maps/Cave`.
+
+        Parameters
+        ----------
+        directory : str
+            The mod directory to index, e.g. `Mods/GenericMod`
+        max_packages : int, optional
+            The maximum number of parsed packages held in memory at once, by default 64
+        """
+        self.directory = directory
+        self.cache = PackageCache(max_packages)
+        self.packages: dict[str, IndexedPackage] = {}
+        self.names: dict[str, list[str]] = {}
+        # Files that map to a package path already taken, such as Foo.umap next to Foo.uasset, and are not resolved to
+        self.duplicates: dict[str, list[str]] = {}
+
+        for path in find_packages(directory):
+            key = os.path.splitext(os.path.relpath(path, directory))[0].replace(os.sep, '/')
+            if key in self.packages:
+                self.duplicates.setdefault(key, [self.packages[key].path]).append(path)
+                continue
+            self.packages[key] = IndexedPackage(self.cache.get(path), key)
+            self.names.setdefault(self.packages[key].name, []).append(key)
+
+    def find(self, name: str) -> IndexedPackage | None:
+        """Finds an indexed package from a full package path such as `/Game/Mods/GenericMod/Maps/Cave`, a path on disk,
+        a path within the mod such as `Maps/Cave`, or a short name such as `Cave` as long as only one package has that name
+        """
+        if os.path.isfile(name):
+            key = os.path.splitext(os.path.relpath(name, self.directory))[0].replace(os.sep, '/')
+            return self.packages.get(key)
+
+        path = os.path.splitext(name.replace('\\', '/'))[0]
+        if '/' not in path:
+            keys = self.names.get(path, [])
+            return self.packages[keys[0]] if len(keys) == 1 else None
+
+        # The package path continues on from the mod directory, e.g. /Game/Mods/<mod>/Maps/Cave
+        mod_name = os.path.basename(os.path.normpath(self.directory))
+        parts = path.strip('/').split('/')
+        for i in range(1, len(parts)):
+            if parts[i - 1] == mod_name and (entry := self.packages.get('/'.join(parts[i:]))) is not None:
+                return entry
+        return self.packages.get(path)
+
+    def load(self, name: str) -> ArkPackage | None:
+        """Gets the parsed package with the given name or path, or `None` if it is not within the indexed directory
+        """
+        if (entry := self.find(name)) is None:
+            return None
+        return self.cache.get(entry.path)
+
+    def get_import_target(self, package: ArkPackage, imp: ArkImport) -> tuple[str, str] | None:
+        """Gets the package path and object name that an import refers to
+
+        Returns
+        -------
+        tuple[str, str] | None
+            The full package path and object name, or `None` if the import references a whole package rather than an object
+        """
+        top = package.get_import_package(imp)
+        if top is imp:
+            return None
+        return top.name(top.object_name) or "", imp.get_object_name()
+
+    def resolve(self, package: ArkPackage, imp: ArkImport) -> ArkExport | None:
+        """Resolves an import of a package to the export it references in another package of the mod
+
+        Parameters
+        ----------
+        package : ArkPackage
+            The package containing the import
+        imp : ArkImport
+            The import to resolve
+
+        Returns
+        -------
+        ArkExport | None
+            The export that the import references, or `None` if it lives outside the indexed directory
+        """
+        if (target := self.get_import_target(package, imp)) is None:
+            return None
+
+        package_path, object_name = target
+        if (entry := self.find(package_path)) is None:
+            return None
+        if (index := entry.exports.get(object_name)) is None:
+            return None
+        return self.cache.get(entry.path).exports[index]
+
+    def resolve_all(self, name: str) -> dict[ArkImport, ArkExport | None]:
+        """Resolves every import of an indexed package
+        """
+        if (package := self.load(name)) is None:
+            return {}
+        return {imp: self.resolve(package, imp) for imp in package.imports}
+
+    def get_dependencies(self, name: str) -> list[str]:
+        """Walks the full dependency closure of a package using only the index, so no package is parsed again
+
+        Parameters
+        ----------
+        name : str
+            The name or path of the package to start from
+
+        Returns
+        -------
+        list[str]
+            Paths of every indexed package that the package depends on, directly or indirectly, in breadth first order
+        """
+        if (start := self.find(name)) is None:
+            return []
+
+        seen = {start.key}
+        queue = [start]
+        dependencies = []
+        for entry in queue:
+            for dependency in sorted(entry.dependencies):
+                if (found := self.find(dependency)) is None or found.key in seen:
+                    continue
+                seen.add(found.key)
+                queue.append(found)
+                dependencies.append(found.path)
+        return dependencies
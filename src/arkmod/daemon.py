@@ -0,0 +1,357 @@
+import io
+import os
+import sys
+import json
+import time
+import click
+import errno
+import socket
+import struct
+import ctypes
+import ctypes.util
+import threading
+import traceback
+import subprocess
+import contextlib
+import socketserver
+
+from .console import log_error, log_info
+from .vcs.arkconfig import ArkModConfig
+from .assets.index import LevelIndex, DEFAULT_INDEX, get_mod_levels
+
+SOCKET_FILE = os.path.join('.git', 'arkmod.sock')
+
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+
+
+class PollingWatcher:
+
+    def __init__(self, root: str, callback: callable, interval: float = 1.0) -> None:
+        """Watches a directory tree for changes by comparing the size and modification time of every file each interval
+
+        Parameters
+        ----------
+        root : str
+            The directory to watch
+        callback : callable
+            Called from the watcher thread with the set of paths that changed
+        interval : float, optional
+            Seconds between each scan, by default 1.0
+        """
+        self.root = root
+        self.callback = callback
+        self.interval = interval
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        files = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for file in filenames:
+                path = os.path.join(dirpath, file)
+                with contextlib.suppress(OSError):
+                    st = os.stat(path)
+                    files[path] = (st.st_mtime_ns, st.st_size)
+        return files
+
+    def run(self) -> None:
+        previous = self.scan()
+        while True:
+            time.sleep(self.interval)
+            current = self.scan()
+            if (changed := {path for path in previous.keys() | current.keys() if previous.get(path) != current.get(path)}):
+                self.callback(changed)
+            previous = current
+
+
+class InotifyWatcher:
+
+    MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, root: str, callback: callable) -> None:
+        """Watches a directory tree for changes through Linux inotify, so nothing is rescanned until a file changes
+
+        Parameters
+        ----------
+        root : str
+            The directory to watch
+        callback : callable
+            Called from the watcher thread with the set of paths that changed, or `None` if events were lost and
+            everything should be treated as changed
+
+        Raises
+        ------
+        OSError
+            If inotify is not available on this system
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+
+        self.root = root
+        self.callback = callback
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "Could not initialise inotify")
+
+        self.watches: dict[int, str] = {}
+        self.add_tree(root)
+
+    def add_tree(self, directory: str) -> None:
+        for dirpath, _, _ in os.walk(directory):
+            if (wd := self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), self.MASK)) >= 0:
+                self.watches[wd] = dirpath
+
+    def run(self) -> None:
+        while True:
+            data = os.read(self.fd, 65536)
+            changed = set()
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+                name = os.fsdecode(data[offset + 16:offset + 16 + length].split(b"\x00", 1)[0])
+                offset += 16 + length
+
+                if mask & IN_Q_OVERFLOW:
+                    changed = None
+                    break
+
+                path = os.path.join(self.watches.get(wd, self.root), name)
+                # Watch new directories, which may already have files in them by the time the watch is added
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                changed.add(path)
+
+            self.callback(changed)
+
+
+class DaemonState:
+
+    def __init__(self, root: str, poll: bool = False) -> None:
+        """The state kept warm by the daemon. The parsed .arkmod config and the current git branch and commit are cached
+        by `ArkModConfig` and `GitInfo` until the files they come from change, while the level index is kept up to
+        date as levels change in the working tree.
+
+        Parameters
+        ----------
+        root : str
+            The arkmod repository, i.e. the directory containing .arkmod
+        poll : bool, optional
+            Always poll for changes instead of using inotify, by default False
+        """
+        self.root = root
+        self.lock = threading.Lock()
+        # Index updates are kept apart from requests, which read the index through connections of their own while
+        # WAL lets them see the last committed state
+        self.index_lock = threading.Lock()
+        self.requests = 0
+
+        # Levels only ever live within the Mods directory, so there is no need to watch the rest of the content
+        watched = os.path.join(root, "Mods") if os.path.isdir(os.path.join(root, "Mods")) else root
+        try:
+            if poll:
+                raise OSError(errno.ENOSYS, "Polling was requested")
+            self.watcher = InotifyWatcher(watched, self.invalidate)
+        except OSError:
+            self.watcher = PollingWatcher(watched, self.invalidate)
+
+        threading.Thread(target=self.watcher.run, daemon=True).start()
+
+    def invalidate(self, paths: set[str] | None) -> None:
+        """Brings the level index up to date with the levels that changed, if the index has been built. This runs on the
+        watcher thread without holding the request lock, so queries keep being answered while levels are re-read.
+        """
+        if not os.path.isfile(os.path.join(self.root, DEFAULT_INDEX)):
+            return
+
+        with self.index_lock:
+            arkmod_data = ArkModConfig.load_configfile()
+            if not arkmod_data:
+                return
+
+            with LevelIndex(os.path.join(self.root, DEFAULT_INDEX)) as level_index:
+                if paths is None:
+                    level_index.build(get_mod_levels(arkmod_data))
+                    return
+
+                mods = {data["directory"]: mod for mod, data in arkmod_data["mods"].items()}
+                for path in paths:
+                    parts = os.path.relpath(path, self.root).split(os.sep)
+                    if len(parts) > 2 and parts[-1].lower().endswith(".umap") and parts[1] in mods:
+                        # A level caught half written cannot be parsed yet. It is refreshed again by the event for
+                        # the rest of the write, so it must not take the watcher thread down with it
+                        with contextlib.suppress(Exception):
+                            level_index.refresh(mods[parts[1]], os.path.join(*parts))
+
+    def run(self, args: list[str]) -> tuple[str, int]:
+        """Runs an arkmod command in this process, capturing everything it outputs
+
+        Returns
+        -------
+        tuple[str, int]
+            The output of the command and its exit code
+        """
+        from .arkmod import cli
+
+        if args and args[0] == "daemon":
+            return "The daemon cannot run daemon commands\n", 1
+
+        output = io.StringIO()
+        with self.lock, contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            self.requests += 1
+            try:
+                # Outside standalone mode click hands back the exit code of a command that exits early instead of raising
+                result = cli.main(args, prog_name="arkmod", standalone_mode=False)
+                code = result if isinstance(result, int) else 0
+            except click.exceptions.Exit as e:
+                code = e.exit_code
+            except click.ClickException as e:
+                e.show(output)
+                code = e.exit_code
+            except click.exceptions.Abort:
+                code = 1
+            except Exception:
+                # Anything else is still answered, so the client is never left waiting on a reply that never comes
+                output.write(traceback.format_exc())
+                code = 1
+        return output.getvalue(), code
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        request = json.loads(self.rfile.readline())
+
+        if request.get("control") == "stop":
+            self.reply("", 0)
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if request.get("control") == "status":
+            return self.reply(f"Serving {self.server.state.root}, {self.server.state.requests} requests handled\n", 0)
+
+        self.reply(*self.server.state.run(request.get("args", [])))
+
+    def reply(self, output: str, code: int) -> None:
+        self.wfile.write(json.dumps({"output": output, "exit-code": code}).encode() + b"\n")
+
+
+def serve(root: str = ".", poll: bool = False) -> None:
+    """Serves arkmod commands over the daemon socket until stopped. Each request is a single line of JSON, either
+    `{"args": [...]}` to run a command or `{"control": "stop" | "status"}`, answered by a single line of JSON holding the
+    `output` and `exit-code`.
+    """
+    root = os.path.abspath(root)
+    path = os.path.join(root, SOCKET_FILE)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+    os.chdir(root)
+    with socketserver.ThreadingUnixStreamServer(path, DaemonHandler) as server:
+        server.state = DaemonState(root, poll)
+        try:
+            server.serve_forever()
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+def call(request: dict, path: str = SOCKET_FILE, timeout: float | None = None) -> dict:
+    """Sends a single request to the daemon and waits for its reply
+
+    Raises
+    ------
+    OSError
+        If the daemon is not running, or closed the connection without replying
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            if not (reply := f.readline()):
+                raise ConnectionError(errno.ECONNRESET, "The arkmod daemon closed the connection without replying")
+            return json.loads(reply)
+
+
+@click.group("daemon")
+def daemon():
+    """Keep a resident arkmod process running that serves commands over a local socket, with the config, git state
+    and level index kept warm
+    """
+
+@daemon.command("start")
+@click.option("--foreground", '-f',
+                is_flag=True,
+                help="Run the daemon in this process rather than in the background")
+@click.option("--poll",
+                is_flag=True,
+                help="Poll the working tree for changes instead of using inotify")
+def daemon_start(foreground: bool,
+                    poll: bool):
+    """Start the daemon in the current arkmod repository
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return log_error("The arkmod daemon needs Unix socket support, which is not available on this system.")
+    if not os.path.isdir(".git"):
+        return log_error("The arkmod daemon must be started in the root of an arkmod repository.")
+
+    with contextlib.suppress(OSError):
+        call({"control": "status"}, timeout=1)
+        return log_error("The arkmod daemon is already running.")
+
+    if foreground:
+        return serve(".", poll)
+
+    args = [sys.executable] if getattr(sys, "frozen", False) else [sys.executable, "-m", "arkmod.arkmod"]
+    subprocess.Popen(args + ["daemon", "start", "--foreground"] + ["--poll"] * poll,
+                        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+    for _ in range(50):
+        with contextlib.suppress(OSError):
+            call({"control": "status"}, timeout=1)
+            return log_info("Started the arkmod daemon")
+        time.sleep(0.1)
+    log_error("The arkmod daemon did not start.")
+
+@daemon.command("stop")
+def daemon_stop():
+    """Stop the daemon running in the current arkmod repository
+    """
+    try:
+        call({"control": "stop"})
+    except OSError:
+        return log_error("The arkmod daemon is not running.")
+    log_info("Stopped the arkmod daemon")
+
+@daemon.command("status")
+def daemon_status():
+    """Show whether the daemon is running in the current arkmod repository
+    """
+    try:
+        click.echo(call({"control": "status"}, timeout=1)["output"], nl=False)
+    except OSError:
+        click.echo("The arkmod daemon is not running.")
+
+@daemon.command("call", context_settings={"ignore_unknown_options": True})
+@click.argument("args", nargs=-1, type=click.UNPROCESSED)
+def daemon_call(args: tuple[str]):
+    """Run an arkmod command through the daemon, e.g. arkmod daemon call index query -c SpawnZone. Scripts and editors
+    wanting the lowest latency should write requests to the socket directly instead.
+    """
+    try:
+        reply = call({"args": list(args)})
+    except (FileNotFoundError, ConnectionRefusedError):
+        log_error("The arkmod daemon is not running. Start it with 'arkmod daemon start'.")
+        raise click.exceptions.Exit(1)
+    except OSError as e:
+        log_error(f"Could not run the command through the arkmod daemon: {e}")
+        raise click.exceptions.Exit(1)
+
+    click.echo(reply["output"], nl=False)
+    raise click.exceptions.Exit(reply["exit-code"])
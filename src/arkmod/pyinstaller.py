@@ -9,5 +9,6 @@ def install():
         path_to_main,
         '--onefile',
         '--windowed',
+        '--add-data', f'{HERE / "assets" / "settings.json"}:arkmod/assets',
         # other pyinstaller options...
     ])
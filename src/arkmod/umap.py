@@ -1,15 +1,39 @@
+import os
+import sys
+import mmap
+import struct
 from io import BufferedReader
 
 def read_int(f):
     return int.from_bytes(f.read(4), 'little')
 
+def read_signed_int(f):
+    return int.from_bytes(f.read(4), 'little', signed=True)
+
+def to_package_index(index: int) -> int:
+    """Converts an unsigned int read from a package into a signed package index, where negative values
+    reference the import table and positive values the export table
+    """
+    return index - (1 << 32) if index & (1 << 31) else index
+
 def read_int128(f):
     return int.from_bytes
 
-def read_string(f, bytes=False):
-    len_ = read_int(f)
-    str_bytes = f.read(len_)
-    return str_bytes if bytes else str_bytes.split(b"\x00")[0].decode('utf-8')
+def read_string(f, bytes=False, max_size: int | None = None):
+    """Reads an FString, whose length is negative when it is stored as UTF-16, which UE does for any non-ASCII text
+
+    Parameters
+    ----------
+    max_size : int | None, optional
+        Bytes available for the string including its length, e.g. the size of a property. A string claiming to be
+        longer is not read and `None` is returned, by default None
+    """
+    len_ = read_signed_int(f)
+    size, encoding = (-len_ * 2, 'utf-16-le') if len_ < 0 else (len_, 'utf-8')
+    if max_size is not None and size > max_size - 4:
+        return None
+    str_bytes = f.read(size)
+    return str_bytes if bytes else str_bytes.decode(encoding, errors='replace').split("\x00")[0]
 
 def read_custom_export(f):
     pass
@@ -66,6 +90,13 @@ class ArkImport:
             return None
         return self.names.data[index]
 
+    @property
+    def outer_index(self) -> int:
+        return to_package_index(self.parent_name)
+
+    def get_object_name(self) -> str:
+        return f"{self.name(self.object_name)}_{self.export_reference or 0}"
+
     def __repr__(self) -> str:
         return f"""
                 ArkImport [{self.offset}](
@@ -101,6 +132,10 @@ class ArkExport:
 
         return self.names.data[index]
 
+    @property
+    def outer_index(self) -> int:
+        return to_package_index(self.tests[1])
+
     def get_object_name(self) -> str:
         return f"{self.name(self.object_name)}_{self.object_index or 0}"
 
@@ -133,31 +168,169 @@ class UmapHeader:
         self.import_table = GenericTable(f, read_one=lambda x: ArkImport(x, self.name_table))
 
 
+class ArkPackage:
+    """Parses the name, import and export tables of a .umap or .uasset package without loading any of its
+    export data
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+        with open(path, "rb") as f:
+            self.header = UmapHeader(f)
+
+            self.names = self.header.name_table.read(f)
+
+            self.imports: list[ArkImport] = self.header.import_table.read(f)
+            self.exports: list[ArkExport] = self.header.export_table.read(f)
+
+    def get_import_package(self, imp: ArkImport) -> ArkImport:
+        """Follows the outer chain of an import up to the top level import naming the package it lives in
+
+        Parameters
+        ----------
+        imp : ArkImport
+            The import to find the package of
+
+        Returns
+        -------
+        ArkImport
+            The top level package import, which is `imp` itself if it already references a package
+        """
+        # Bounded by the table length so a malformed outer chain can never loop forever
+        for _ in range(len(self.imports)):
+            if not (imp.outer_index < 0 and -imp.outer_index <= len(self.imports)):
+                break
+            imp = self.imports[-imp.outer_index - 1]
+        return imp
+
+    def get_export_path(self, export: ArkExport) -> list[str]:
+        """Gets the object names of an export and each of the exports it is nested within, outermost first
+        """
+        path = [export.get_object_name()]
+        # Bounded by the table length so a malformed outer chain can never loop forever
+        for _ in range(len(self.exports)):
+            if not 0 < export.outer_index <= len(self.exports):
+                break
+            export = self.exports[export.outer_index - 1]
+            path.insert(0, export.get_object_name())
+        return path
+
+    def get_export_class(self, export: ArkExport) -> str | None:
+        """Gets the name of the class of an export, looking it up through the import or export table
+        """
+        index = to_package_index(export.mystical_flags)
+        if index < 0 and -index <= len(self.imports):
+            imp = self.imports[-index - 1]
+            return imp.name(imp.object_name)
+        if 0 < index <= len(self.exports):
+            return self.exports[index - 1].name(self.exports[index - 1].object_name)
+        return None
+
+
+class ActorProperty:
+    """A single tagged property read from the property stream of an actor
+    """
+
+    def __init__(self, name: str, type_: str, offset: int, size: int, array_index: int = 0, value=None) -> None:
+        self.name = name
+        self.type = type_
+        # Offset and size of the serialised value itself, not the tag preceding it
+        self.offset = offset
+        self.size = size
+        self.array_index = array_index
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"ActorProperty({self.name}: {self.type} [{self.offset}, {self.size}] = {self.value})"
+
+
+def read_property_value(f: BufferedReader, export_data: ArkExport, prop_type: str, size: int):
+    """Decodes the value of a property of a simple type, returning `None` for any types that are not understood
+    """
+    match prop_type:
+        case "IntProperty":
+            return read_signed_int(f)
+        case "UInt32Property":
+            return read_int(f)
+        case "Int64Property":
+            return int.from_bytes(f.read(8), 'little', signed=True)
+        case "FloatProperty":
+            return struct.unpack("<f", f.read(4))[0]
+        case "DoubleProperty":
+            return struct.unpack("<d", f.read(8))[0]
+        case "NameProperty":
+            return export_data.name(read_int(f))
+        case "ObjectProperty":
+            return read_signed_int(f)
+        case "StrProperty":
+            return read_string(f, max_size=size)
+        case "ByteProperty":
+            return f.read(1)[0] if size == 1 else export_data.name(read_int(f))
+    return None
+
+
 class UmapActor:
 
-    def __init__(self, export_data: ArkExport, f: BufferedReader) -> None:
+    def __init__(self, export_data: ArkExport, f: BufferedReader, decode: set[str] | None = None) -> None:
+        """Reads the tagged property stream of an actor export
+
+        Parameters
+        ----------
+        export_data : ArkExport
+            The export of the actor to read
+        f : BufferedReader
+            The package file the export belongs to
+        decode : set[str] | None, optional
+            Names of the properties whose values should be decoded, the rest are skipped over by size. Decodes
+            every property if not specified, by default None
+        """
         self.components = {}
+        self.properties: list[ActorProperty] = []
         f.seek(export_data.offset)
 
-        print(f"Loading {export_data.get_object_name()} data {export_data.offset}")
-        print(export_data.names.data)
+        end = export_data.offset + export_data.size
 
-        # Read components
-        while(f.tell() - export_data.offset < export_data.size):
+        # Read components until the terminating None tag
+        while f.tell() + 24 <= end:
 
             comp = export_data.name(read_int(f))
             # Padding
             _ = read_int(f)
+            if comp is None or comp == "None":
+                break
+
             comp_type = export_data.name(read_int(f))
             _ = read_int(f)
-            if comp_type == "BoolProperty":
+            size = read_int(f)
+            array_index = read_int(f)
+
+            # Stop at anything that does not look like a property tag rather than reading garbage
+            if not comp_type or not comp_type.endswith("Property"):
+                break
+
+            if comp_type in ("StructProperty", "ByteProperty"):
+                # Struct or enum name
                 _ = read_int(f)
-                _ =read_int(f)
-                self.components.update({comp: True})
-                value = bool.from_bytes(f.read(1))
-            else:
-                value = export_data.name(read_int(f))
-            print(f"{comp}: {comp_type}: {value}")
+                _ = read_int(f)
+
+            offset = f.tell()
+            if comp_type == "BoolProperty":
+                size = 1
+            if offset + size > end:
+                break
+
+            value = None
+            if decode is None or comp in decode:
+                # A value that cannot be decoded is left as None rather than failing the whole actor
+                try:
+                    value = bool.from_bytes(f.read(1), 'little') if comp_type == "BoolProperty" else read_property_value(f, export_data, comp_type, size)
+                except (ValueError, IndexError, struct.error):
+                    value = None
+
+            self.properties.append(ActorProperty(comp, comp_type, offset, size, array_index, value))
+            self.components.update({comp: value})
+            f.seek(offset + size)
 
 
 
@@ -187,17 +360,42 @@ class Umap:
             if "Gen2_cave_1_volume" in name:
                 actor = UmapActor(i, f)
 
-def dump_umap_import_exports(path: str) -> None:
+def copy_byte_range(src_fd: int, dest_fd: int, offset: int, size: int) -> None:
+    """Copies a range of one file onto the end of another inside the kernel where possible, falling back to copy_file_range,
+    sendfile and finally an mmap slice. The source file position is never used, so many threads can share `src_fd`.
+    """
+    end = offset + size
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < end and (copied := os.copy_file_range(src_fd, dest_fd, end - offset, offset_src=offset)):
+                offset += copied
+        except OSError:
+            pass
+
+    if offset < end and hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        try:
+            while offset < end and (copied := os.sendfile(dest_fd, src_fd, offset, end - offset)):
+                offset += copied
+        except OSError:
+            pass
+
+    if offset < end:
+        with mmap.mmap(src_fd, 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            while offset < end and (written := os.write(dest_fd, view[offset:end])):
+                offset += written
+
+def dump_umap_import_exports(path: str, output_dir: str = ".") -> None:
 
-    name = path.split('\\')[-1].split('.')[0]
+    name = os.path.splitext(os.path.basename(path.replace('\\', os.sep)))[0]
 
     with open(path, "rb") as f:
         header = UmapHeader(f)
 
-        with open(f"{name}_imports.umap", "wb") as imports:
+        with open(os.path.join(output_dir, f"{name}_imports.umap"), "wb") as imports:
             imports.write(header.import_table.read_bytes(f, entry_length=ArkImport.BYTESIZE))
 
-        with open(f"{name}_exports.umap", "wb") as exports:
+        with open(os.path.join(output_dir, f"{name}_exports.umap"), "wb") as exports:
             exports.write(header.export_table.read_bytes(f, entry_length=ArkExport.BYTESIZE))
 
 
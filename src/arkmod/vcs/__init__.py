@@ -13,3 +13,5 @@ def attach_endpoints(cli: callable):
     cli.add_command(vcs.set_remote)
     cli.add_command(vcs.edit_mod)
     cli.add_command(vcs.create_release)
+    cli.add_command(vcs.sync_mod_db)
+    cli.add_command(vcs.status)
@@ -1,12 +1,111 @@
 import os
 import json
+import tempfile
+import warnings
+import contextlib
+import functools
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
 
 from . import gitcommands
 from ..console import run_command_fetch_output, log_error
 
+CONFIG_FILE = '.arkmod'
+
+
+class ConfigLock:
+
+    # Threads of this process queue on the guard, which also lets the thread holding the lock take it again
+    guard = threading.RLock()
+    depth = 0
+    f = None
+
+    def __init__(self, path: str | None = None) -> None:
+        """Exclusive inter-process lock over the repository, held by every command that changes the git state or config
+        so concurrent arkmod invocations run one after the other instead of interleaving their checkouts and commits.
+        The lock is reentrant within a thread, so a command holding it can still call `ArkModConfig.update_configfile`.
+
+        Parameters
+        ----------
+        path : str | None, optional
+            The lock file to use. Defaults to a file inside `.git`, so nothing appears in the working tree
+        """
+        self.path = path or (os.path.join('.git', 'arkmod.lock') if os.path.isdir('.git') else '.arkmod.lock')
+
+    def __enter__(self):
+        ConfigLock.guard.acquire()
+        if ConfigLock.depth == 0:
+            try:
+                ConfigLock.f = self.lock_file(self.path)
+            except BaseException:
+                ConfigLock.guard.release()
+                raise
+        ConfigLock.depth += 1
+        return self
+
+    def __exit__(self, type, value, traceback):
+        ConfigLock.depth -= 1
+        if ConfigLock.depth == 0:
+            if fcntl is not None:
+                fcntl.flock(ConfigLock.f.fileno(), fcntl.LOCK_UN)
+            else:
+                ConfigLock.f.seek(0)
+                msvcrt.locking(ConfigLock.f.fileno(), msvcrt.LK_UNLCK, 1)
+            ConfigLock.f.close()
+            ConfigLock.f = None
+        ConfigLock.guard.release()
+
+    @staticmethod
+    def lock_file(path: str):
+        f = open(path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            # LK_LOCK gives up after 10 seconds, so keep retrying until the other invocation is done
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        return f
+
+
+def dumps_config(data: dict) -> str:
+    """Serialises the config with each mod record on a line of its own. This is still plain JSON, but lets a single mod
+    be looked up without parsing the whole document and keeps git diffs and merges to one line per mod.
+    """
+    head = json.dumps({key: value for key, value in data.items() if key != "mods"}, indent=2)
+    mods = ",\n".join(f"    {json.dumps(name)}: {json.dumps(mod)}" for name, mod in data.get("mods", {}).items())
+    mods = f'"mods": {{\n{mods}\n  }}' if mods else '"mods": {}'
+    return f'{head[:-2]},\n  {mods}\n}}\n' if head != "{}" else f'{{\n  {mods}\n}}\n'
+
+def write_json_atomic(path: str, text: str) -> None:
+    """Writes a file by renaming a fully written temporary file over it, so a crash can never leave it half written
+    """
+    fd, tmp = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
 class ArkModConfig:
 
     current_mod: str = None
+    cache: tuple[tuple, dict] | None = None
     DEFAULT_COPYFILES: dict[str, str] = {
         ".\\Mods\\GenericMod\\GenericMod.umap": "Mods\\<ArkMod:ModName>\\<ArkMod:ModName>.umap",
         ".\\Mods\\GenericMod\\PrimalGameData_BP_GenericMod.uasset": "Mods\\<ArkMod:ModName>\\PrimalGameData_BP_<ArkMod:ModName>.uasset",
@@ -16,38 +115,122 @@ class ArkModConfig:
 
     @staticmethod
     def init_configfile(db: str, base_branch: str = "master", from_existing_git: bool = False):
-        with open('.arkmod', 'w+') as f:
-            json.dump({
-                "config": {
-                    "copyfiles": ArkModConfig.DEFAULT_COPYFILES,
-                    "from-existing": from_existing_git,
-                    "current-mod": None,
-                    "git-base": base_branch,
-                    "mod-db": db
-                },
-                "mods": {}
-            }, f, indent=2)
+        write_json_atomic(CONFIG_FILE, dumps_config({
+            "config": {
+                "copyfiles": ArkModConfig.DEFAULT_COPYFILES,
+                "from-existing": from_existing_git,
+                "current-mod": None,
+                "git-base": base_branch,
+                "mod-db": db
+            },
+            "mods": {}
+        }))
+
+    @staticmethod
+    def update_configfile(update: callable, msg: str = "Updated .arkmod config.") -> dict:
+        """Applies a change to the config on the git base branch and merges it back into the current branch.
+
+        The config is re-read from the base branch while holding the config lock, so the change is applied on top of
+        any made by other arkmod invocations since this one started rather than overwriting them.
+
+        Parameters
+        ----------
+        update : callable
+            Function that edits the loaded config data in place
+        msg : str, optional
+            The commit message for the change, by default "Updated .arkmod config."
+
+        Returns
+        -------
+        dict
+            The config data as written
+        """
+        with ConfigLock():
+            cmd = gitcommands.CheckoutBranch(ArkModConfig.load_configfile()["config"]["git-base"])
+            cmd.execute()
+
+            data = ArkModConfig.load_configfile(use_cache=False)
+            update(data)
+            write_json_atomic(CONFIG_FILE, dumps_config(data))
+
+            gitcommands.Commit((CONFIG_FILE,), msg).execute()
+            cmd.rollback()
+            run_command_fetch_output(f'git merge {data["config"]["git-base"]}')
+        return data
 
     @staticmethod
     def save_configfile(data: dict) -> None:
-        cmd = gitcommands.CheckoutBranch(data["config"]["git-base"])
-        cmd.execute()
-        with open('.arkmod', 'w+') as f:
-            json.dump(data, f, indent=2)
-        gitcommands.Commit(('.arkmod',), "Added additional mods to .arkmod config.").execute()
-        cmd.rollback()
-        run_command_fetch_output(f'git merge {data["config"]["git-base"]}')
+        """Deprecated, use `update_configfile` instead.
+
+        Merges a copy of the config into the latest one rather than replacing it, so mods registered by other arkmod
+        invocations since the copy was loaded are kept. Entries removed from the copy are not removed.
+        """
+        warnings.warn("ArkModConfig.save_configfile is deprecated, use ArkModConfig.update_configfile instead",
+                        DeprecationWarning, stacklevel=2)
+
+        def merge(current: dict) -> None:
+            for key, value in data.items():
+                if isinstance(value, dict) and isinstance(current.get(key), dict):
+                    current[key].update(value)
+                else:
+                    current[key] = value
+        ArkModConfig.update_configfile(merge, "Added additional mods to .arkmod config.")
 
     @staticmethod
-    def load_configfile() -> dict:
-        if not os.path.isfile('.arkmod'):
+    def load_configfile(use_cache: bool = True) -> dict:
+        """Loads the .arkmod config, only parsing it again if the file has changed since it was last loaded by this
+        process. The cached data is shared, so anything that edits it must pass `use_cache=False`.
+        """
+        try:
+            st = os.stat(CONFIG_FILE)
+        except FileNotFoundError:
             return {}
-        with open('.arkmod', "r+") as f:
-            return json.load(f)
+
+        key = (os.path.abspath(CONFIG_FILE), st.st_ino, st.st_mtime_ns, st.st_size)
+        if use_cache and ArkModConfig.cache is not None and ArkModConfig.cache[0] == key:
+            return ArkModConfig.cache[1]
+
+        with open(CONFIG_FILE, "r") as f:
+            data = json.load(f)
+        if use_cache:
+            ArkModConfig.cache = (key, data)
+        return data
+
+    @staticmethod
+    def get_mod(name: str) -> dict | None:
+        """Looks up the record of a single mod, only parsing the line it is on
+
+        Falls back to parsing the whole config if it has been edited by hand out of the one-line-per-mod layout.
+
+        Returns
+        -------
+        dict | None
+            The mod record, or `None` if there is no mod with that name
+        """
+        if not os.path.isfile(CONFIG_FILE):
+            return None
+
+        prefix = f"    {json.dumps(name)}: "
+        with open(CONFIG_FILE, "r") as f:
+            # Only look within the mods, since the keys of "config" are indented the same way
+            for line in f:
+                if line.startswith('  "mods": {'):
+                    break
+            for line in f:
+                if line.startswith("  }"):
+                    break
+                if line.startswith(prefix):
+                    with contextlib.suppress(ValueError):
+                        if isinstance(mod := json.loads(line[len(prefix):].rstrip().rstrip(',')), dict):
+                            return mod
+                    break
+        mod = ArkModConfig.load_configfile().get("mods", {}).get(name)
+        return mod if isinstance(mod, dict) else None
 
 
 def pass_arkmod_data(name: str = "arkmod_data"):
     def pass_arkmod_data(func):
+        @functools.wraps(func)
         def inner(*args, **kwargs):
             data = ArkModConfig.load_configfile()
             if not data:
@@ -56,3 +239,30 @@ def pass_arkmod_data(name: str = "arkmod_data"):
             return func(*args, **kwargs)
         return inner
     return pass_arkmod_data
+
+def requires_arkmod():
+    """Like `pass_arkmod_data`, but only checks that arkmod has been initialised for commands that look up what they need themselves
+    """
+    def requires_arkmod(func):
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            if not os.path.isfile(CONFIG_FILE):
+                return log_error("You must initialise arkmod using 'arkmod init' before using the arkmod vcs interface. See arkmod --help for more info.")
+            return func(*args, **kwargs)
+        return inner
+    return requires_arkmod
+
+def holds_config_lock():
+    """Holds the config lock for the whole of a command, including loading the config, so the checkouts and commits
+    of concurrent arkmod invocations never interleave in the shared working tree. Must be applied above
+    `pass_arkmod_data` so the data passed in is read under the lock.
+    """
+    def holds_config_lock(func):
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            if not os.path.isdir('.git'):
+                return func(*args, **kwargs)
+            with ConfigLock():
+                return func(*args, **kwargs)
+        return inner
+    return holds_config_lock
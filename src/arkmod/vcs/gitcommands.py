@@ -109,6 +109,19 @@ class CreateRemote(Command):
     def rollback(self) -> None:
         run_command_fetch_output(f"git remote remove {self.remote_name}")
 
+class FetchRemote(Command):
+
+    def __init__(self, name: str) -> None:
+        self.remote_name = name
+
+    def execute(self) -> bool:
+        output = run_command_fetch_output(f"git fetch {self.remote_name}")
+        return git_cmd_was_successful(output)
+
+    def rollback(self) -> None:
+        # Fetched refs are removed along with the remote itself
+        pass
+
 class SetBranchRemote(Command):
 
     def __init__(self, local_branch: str, remote_name: str, remote_branch: str):
@@ -2,11 +2,32 @@ import os
 
 from ..console import run_command_fetch_output, git_cmd_was_successful
 
+
+def stat_key(*paths: str) -> tuple:
+    """Identifies the current version of some files by their inode, modification time and size. git replaces refs by
+    renaming a new file over them, so any change to a ref changes its key.
+    """
+    key = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            key.append((os.path.abspath(path), st.st_ino, st.st_mtime_ns, st.st_size))
+        except OSError:
+            key.append((os.path.abspath(path), None))
+    return tuple(key)
+
+
 class GitInfo:
     """Contains helper functions that return information about the current git instance. \n
     Note that no functions exposed by this interface will edit or change the current git repository in any way.
+
+    The current branch and commit are cached against the files git keeps them in, so a long running process such as
+    the arkmod daemon only reads them again once they change.
     """
 
+    branch_cache: tuple[tuple, str] | None = None
+    commit_cache: tuple[tuple, str] | None = None
+
     @staticmethod
     def get_current_branch() -> str | None:
         """Gets the name of the current git branch that is active
@@ -16,8 +37,28 @@ class GitInfo:
         str | None
             The git branch that is active, or `None` if the command fails
         """
-        output = run_command_fetch_output("git rev-parse --abbrev-ref HEAD")
-        return output[0] if git_cmd_was_successful(output) else None
+        key = stat_key(os.path.join(".git", "HEAD"))
+        if GitInfo.branch_cache is not None and GitInfo.branch_cache[0] == key:
+            return GitInfo.branch_cache[1]
+
+        # Read the branch straight out of HEAD when it is a plain ref to save spawning git
+        branch = None
+        try:
+            with open(os.path.join(".git", "HEAD"), "r") as f:
+                head = f.read().strip()
+            if head.startswith("ref: refs/heads/"):
+                branch = head[len("ref: refs/heads/"):]
+        except OSError:
+            pass
+
+        if branch is None:
+            output = run_command_fetch_output("git rev-parse --abbrev-ref HEAD")
+            if not git_cmd_was_successful(output):
+                return None
+            branch = output[0]
+
+        GitInfo.branch_cache = (key, branch)
+        return branch
 
     @staticmethod
     def get_current_commit_hash() -> str | None:
@@ -28,8 +69,16 @@ class GitInfo:
         str | None
             Hash of the HEAD of the current active branch, or `None` if the command fails
         """
+        branch = GitInfo.get_current_branch()
+        key = stat_key(os.path.join(".git", "HEAD"), os.path.join(".git", "packed-refs"), os.path.join(".git", "refs", "heads", branch or ""))
+        if GitInfo.commit_cache is not None and GitInfo.commit_cache[0] == key:
+            return GitInfo.commit_cache[1]
+
         output = run_command_fetch_output("git rev-parse --short HEAD")
-        return output[0] if git_cmd_was_successful(output) else None
+        if not git_cmd_was_successful(output):
+            return None
+        GitInfo.commit_cache = (key, output[0])
+        return output[0]
 
     @staticmethod
     def is_git_installed() -> bool:
@@ -1,19 +1,69 @@
 import json
 
+from .arkconfig import write_json_atomic
+
 class ModDatabase:
 
     def __init__(self, mod_path: str) -> None:
+        """The devkit's Mods.db list of mods, indexed by `ModDir` and `Title`.
+
+        Changes are written straight away, unless made inside a `with` block, in which case they are all written at once
+        when the block exits.
+
+        Parameters
+        ----------
+        mod_path : str
+            Path to the Mods.db file
+        """
         self.fp = mod_path
         with open(self.fp, "r") as f:
             self.data = json.load(f)
+        self.data.setdefault("Mods", [])
+
+        self.batch_depth = 0
+        self.dirty = False
+        self.reindex()
+
+    def __enter__(self):
+        self.batch_depth += 1
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.batch_depth -= 1
+        if type is None and self.batch_depth == 0 and self.dirty:
+            self.write_data()
+
+    def reindex(self) -> None:
+        self.by_dir: dict[str, dict] = {}
+        self.by_title: dict[str, dict] = {}
+        for mod in self.data["Mods"]:
+            self.by_dir.setdefault(mod.get("ModDir"), mod)
+            self.by_title.setdefault(mod.get("Title"), mod)
 
     def write_data(self) -> None:
-        with open(self.fp, "w+") as f:
-            json.dump(self.data, f, indent=2)
+        write_json_atomic(self.fp, json.dumps(self.data, indent=2))
+        self.dirty = False
+
+    def changed(self) -> None:
+        """Marks the data as changed, writing it now unless inside a batch
+        """
+        if self.batch_depth:
+            self.dirty = True
+        else:
+            self.write_data()
+
+    def get_mod(self, mod_dir: str | None = None, title: str | None = None) -> dict | None:
+        if mod_dir is not None:
+            return self.by_dir.get(mod_dir)
+        return self.by_title.get(title)
 
     def create_mod(self, mod_name: str, mod_dir: str, default_maps: list[str]) -> None:
-        print(default_maps)
-        self.data["Mods"].append({
+        # Update the existing entry rather than adding a duplicate
+        if self.get_mod(mod_dir=mod_dir) is not None:
+            self.update_mod(mod_dir, Title=mod_name, Maps=default_maps)
+            return
+
+        mod = {
             "ModDir": mod_dir,
             "Maps": default_maps,
             "Title": mod_name,
@@ -24,6 +74,57 @@ class ModDatabase:
 			"ItemSeamId": "",
 			"GUID": "",
 			"Tags": ""
-        })
-        self.write_data()
+        }
+        self.data["Mods"].append(mod)
+        self.by_dir[mod_dir] = mod
+        self.by_title.setdefault(mod_name, mod)
+        self.changed()
+
+    def update_mod(self, mod_dir: str, **fields) -> bool:
+        """Updates the fields of the entry with the given `ModDir`
+
+        Returns
+        -------
+        bool
+            `True` if the mod exists else `False`
+        """
+        if (mod := self.get_mod(mod_dir=mod_dir)) is None:
+            return False
+
+        # Keep the indexes in step without rebuilding them, so a batch of updates stays linear
+        for index, key in ((self.by_dir, "ModDir"), (self.by_title, "Title")):
+            if key in fields and fields[key] != mod.get(key):
+                if index.get(mod.get(key)) is mod:
+                    del index[mod.get(key)]
+                index.setdefault(fields[key], mod)
+
+        mod.update(fields)
+        self.changed()
+        return True
+
+    def reconcile(self, arkmod_data: dict, maps: dict[str, list[str]] | None = None) -> tuple[list[str], list[str]]:
+        """Adds an entry for every mod registered in the .arkmod config that is missing from the database, and corrects
+        the title of entries whose mod has been renamed, in a single write
+
+        Parameters
+        ----------
+        arkmod_data : dict
+            The loaded .arkmod config
+        maps : dict[str, list[str]] | None, optional
+            The default maps to give each newly added mod, by mod name, by default None
 
+        Returns
+        -------
+        tuple[list[str], list[str]]
+            The names of the mods that were added and those that were updated
+        """
+        added, updated = [], []
+        with self:
+            for name, mod in arkmod_data["mods"].items():
+                if (entry := self.get_mod(mod_dir=mod["directory"])) is None:
+                    self.create_mod(name, mod["directory"], (maps or {}).get(name, [mod["directory"]]))
+                    added.append(name)
+                elif entry.get("Title") != name:
+                    self.update_mod(mod["directory"], Title=name)
+                    updated.append(name)
+        return added, updated
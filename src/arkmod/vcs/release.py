@@ -0,0 +1,196 @@
+import os
+import re
+import json
+import zlib
+import shutil
+import tarfile
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .arkconfig import write_json_atomic
+
+CHUNK_SIZE = 32 << 20
+OBJECTS_DIR = ".objects"
+# Kept inside .git so archives and cached objects never show up in the working tree
+RELEASES_DIR = os.path.join(".git", "arkmod-releases")
+VERSION = re.compile(r"(\d+)\.(\d+)\.(\d+)")
+
+
+def parse_version(version: str) -> tuple[int, int, int]:
+    """Gets the major, minor and patch numbers of a version, ignoring anything after them such as an `-rc` suffix.
+    Versions that do not start with x.y.z sort before every other version.
+    """
+    if (match := VERSION.match(version)) is None:
+        return (-1, -1, -1)
+    return tuple(int(x) for x in match.groups())
+
+def is_version(version: str) -> bool:
+    return VERSION.fullmatch(version) is not None
+
+
+def gzip_member(data: bytes, level: int = 6) -> bytes:
+    """Compresses data into a complete gzip member. Members can be concatenated into one valid gzip stream, which is
+    what lets each file, and each chunk of a large file, be compressed independently and in parallel.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+def list_files(commit: str, directory: str) -> list[tuple[str, str, int]]:
+    """Lists every file within a directory at a commit without checking anything out
+
+    Returns
+    -------
+    list[tuple[str, str, int]]
+        The path, blob hash and size of each file
+    """
+    output = subprocess.run(["git", "ls-tree", "-r", "-l", "-z", commit, "--", directory.replace('\\', '/')],
+                            capture_output=True, check=True).stdout
+    files = []
+    for entry in output.split(b"\x00"):
+        if not entry:
+            continue
+        info, path = entry.split(b"\t", 1)
+        _, type_, blob, size = info.split()
+        if type_ == b"blob":
+            files.append((path.decode("utf-8"), blob.decode(), int(size)))
+    return files
+
+def load_manifest(path: str | None) -> dict:
+    if not path or not os.path.isfile(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class ReleasePackager:
+
+    def __init__(self, output_dir: str, workers: int | None = None, level: int = 6) -> None:
+        """Packages mod content straight out of git into .tar.gz archives.
+
+        The content of every file is compressed into a gzip member kept in `output_dir/.objects`, named by the git blob
+        hash, so files unchanged since a previous release are never read or compressed again. Large files are split
+        into chunks that are compressed in parallel.
+
+        Parameters
+        ----------
+        output_dir : str
+            Directory the archives, manifests and cached objects are written to
+        workers : int | None, optional
+            Number of threads compressing at once, by default None
+        level : int, optional
+            zlib compression level, by default 6
+        """
+        self.output_dir = output_dir
+        self.objects_dir = os.path.join(output_dir, OBJECTS_DIR)
+        self.workers = workers or os.cpu_count() or 1
+        self.level = level
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def object_path(self, blob: str) -> str:
+        return os.path.join(self.objects_dir, f"{blob}.gz")
+
+    def compress_blobs(self, files: list[tuple[str, str, int]]) -> None:
+        """Compresses every blob that does not already have a cached object, streaming each one out of git in chunks
+        and keeping only a bounded number of chunks in memory at once
+        """
+        pending = {blob: size for _, blob, size in files if not os.path.isfile(self.object_path(blob))}
+        if not pending:
+            return
+
+        inflight = deque()
+        outputs = {}
+
+        def drain(limit: int) -> None:
+            while len(inflight) > limit:
+                blob, future, last = inflight.popleft()
+                outputs[blob].write(future.result())
+                if last:
+                    outputs.pop(blob).close()
+                    os.replace(self.object_path(blob) + ".tmp", self.object_path(blob))
+
+        # A single git process streams every blob, one request at a time so its output pipe never fills up unread
+        with ThreadPoolExecutor(max_workers=self.workers) as pool, \
+                subprocess.Popen(["git", "cat-file", "--batch"], stdin=subprocess.PIPE, stdout=subprocess.PIPE) as proc:
+            try:
+                for blob, size in pending.items():
+                    outputs[blob] = open(self.object_path(blob) + ".tmp", "wb")
+                    padding = b"\x00" * (-size % tarfile.BLOCKSIZE)
+
+                    if size == 0:
+                        inflight.append((blob, pool.submit(bytes), True))
+                        drain(self.workers * 2)
+                        continue
+
+                    proc.stdin.write(f"{blob}\n".encode())
+                    proc.stdin.flush()
+                    if proc.stdout.readline().split()[1:] != [b"blob", str(size).encode()]:
+                        raise OSError(f"git cat-file could not read blob {blob}")
+
+                    remaining = size
+                    while remaining > 0:
+                        chunk = proc.stdout.read(min(CHUNK_SIZE, remaining))
+                        if not chunk:
+                            raise OSError(f"git cat-file ended early reading blob {blob}")
+                        remaining -= len(chunk)
+                        # The tar padding after the file content is part of the cached object
+                        if remaining == 0:
+                            chunk += padding
+                        inflight.append((blob, pool.submit(gzip_member, chunk, self.level), remaining == 0))
+                        drain(self.workers * 2)
+                    proc.stdout.read(1)
+
+                drain(0)
+            finally:
+                proc.stdin.close()
+                for f in outputs.values():
+                    f.close()
+
+    def package(self, commit: str, directory: str, name: str, previous_manifest: str | None = None) -> tuple[str, str, list[str]]:
+        """Packages the contents of a directory at a commit into `<name>.tar.gz`, along with a manifest of its files
+
+        Parameters
+        ----------
+        commit : str
+            The commit, branch or tag to package
+        directory : str
+            The directory to package, e.g. Mods/GenericMod
+        name : str
+            Name of the archive and manifest, without extensions
+        previous_manifest : str | None, optional
+            Manifest of the previous release, used to report which files changed, by default None
+
+        Returns
+        -------
+        tuple[str, str, list[str]]
+            The paths of the archive and manifest, and the files that changed since the previous release
+        """
+        files = list_files(commit, directory)
+        previous = load_manifest(previous_manifest).get("files", {})
+        changed = [path for path, blob, _ in files if previous.get(path, {}).get("blob") != blob]
+
+        self.compress_blobs(files)
+
+        mtime = int(subprocess.run(["git", "show", "-s", "--format=%ct", commit], capture_output=True, text=True, check=True).stdout.strip())
+
+        archive = os.path.join(self.output_dir, f"{name}.tar.gz")
+        with open(archive + ".tmp", "wb") as out:
+            for path, blob, size in files:
+                info = tarfile.TarInfo(path)
+                info.size = size
+                info.mtime = mtime
+                info.mode = 0o644
+                out.write(gzip_member(info.tobuf(format=tarfile.GNU_FORMAT), self.level))
+                with open(self.object_path(blob), "rb") as obj:
+                    shutil.copyfileobj(obj, out, CHUNK_SIZE)
+            out.write(gzip_member(b"\x00" * tarfile.BLOCKSIZE * 2, self.level))
+        os.replace(archive + ".tmp", archive)
+
+        manifest = os.path.join(self.output_dir, f"{name}.manifest.json")
+        write_json_atomic(manifest, json.dumps({
+            "commit": subprocess.run(["git", "rev-parse", commit], capture_output=True, text=True, check=True).stdout.strip(),
+            "directory": directory,
+            "files": {path: {"blob": blob, "size": size} for path, blob, size in files}
+        }, indent=2))
+
+        return archive, manifest, changed
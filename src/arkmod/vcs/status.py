@@ -0,0 +1,159 @@
+import os
+import time
+import json
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from .arkconfig import write_json_atomic
+from .release import list_files
+
+STAT_CACHE = os.path.join('.git', 'arkmod-stat-cache.json')
+CHUNK_SIZE = 1 << 20
+# Files modified this recently are never cached, as a later change within the same mtime tick would go unnoticed
+RACY_SECONDS = 2
+
+
+def hash_blob(path: str, size: int) -> str:
+    """Hashes a file the same way git hashes a blob, reading it in chunks
+    """
+    digest = hashlib.sha1(f"blob {size}\0".encode())
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_converted(paths: list[str]) -> set[str]:
+    """Finds the files git converts on the way into the repository, either through a clean filter such as git lfs or
+    through line ending conversion. Their raw contents do not hash to the blob git stores for them.
+    """
+    if not paths:
+        return set()
+
+    autocrlf = subprocess.run(["git", "config", "--get", "core.autocrlf"], capture_output=True, text=True).stdout.strip().lower()
+    if autocrlf in ("true", "input"):
+        return set(paths)
+
+    output = subprocess.run(["git", "check-attr", "-z", "--stdin", "filter", "text", "eol"],
+                            input="\0".join(paths).encode("utf-8"), capture_output=True, check=True).stdout
+    fields = output.split(b"\x00")
+    return {
+        fields[i].decode("utf-8") for i in range(0, len(fields) - 2, 3)
+        if fields[i + 2] not in (b"unspecified", b"unset")
+    }
+
+def hash_converted(paths: list[str]) -> list[str]:
+    """Hashes files through git itself, which applies the same filters and conversions as `git add`
+    """
+    output = subprocess.run(["git", "hash-object", "--stdin-paths"], input="\n".join(paths) + "\n",
+                            capture_output=True, text=True, check=True).stdout
+    return output.split()
+
+
+class StatCache:
+
+    def __init__(self, path: str = STAT_CACHE) -> None:
+        """Persistent cache of the git blob hash of files, keyed by their size, modification time and inode, so only files
+        whose stat information has changed are ever hashed again
+
+        Parameters
+        ----------
+        path : str, optional
+            The file the cache is kept in, by default STAT_CACHE
+        """
+        self.path = path
+        self.entries: dict[str, list] = {}
+        self.dirty = False
+        if os.path.isfile(path):
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+
+    def hash_files(self, paths: list[str], workers: int | None = None) -> dict[str, str]:
+        """Gets the blob hash of every file, hashing those not in the cache in parallel
+
+        Returns
+        -------
+        dict[str, str]
+            The blob hash of every file that exists
+        """
+        hashes = {}
+        stale = []
+        now = time.time()
+
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            key = [st.st_size, st.st_mtime_ns, st.st_ino]
+            if (entry := self.entries.get(path)) is not None and entry[:3] == key:
+                hashes[path] = entry[3]
+            else:
+                stale.append((path, key, st.st_mtime < now - RACY_SECONDS))
+
+        if stale:
+            converted = find_converted([path for path, _, _ in stale])
+            plain = [s for s in stale if s[0] not in converted]
+            filtered = [s for s in stale if s[0] in converted]
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(zip(plain, pool.map(lambda s: hash_blob(s[0], s[1][0]), plain)))
+            if filtered:
+                results.extend(zip(filtered, hash_converted([path for path, _, _ in filtered])))
+
+            for (path, key, cacheable), hash_ in results:
+                hashes[path] = hash_
+                if cacheable:
+                    self.entries[path] = key + [hash_]
+                    self.dirty = True
+
+        return hashes
+
+    def save(self) -> None:
+        if self.dirty:
+            write_json_atomic(self.path, json.dumps(self.entries))
+            self.dirty = False
+
+
+def walk_files(directory: str) -> list[str]:
+    return [
+        os.path.join(root, file).replace(os.sep, '/')
+        for root, _, files in os.walk(directory) for file in files
+    ]
+
+def find_ignored(directory: str) -> set[str]:
+    """Finds the untracked files within a directory that git ignores, which are never reported as added
+    """
+    output = subprocess.run(["git", "ls-files", "-z", "--others", "--ignored", "--exclude-standard", "--", directory.replace('\\', '/')],
+                            capture_output=True, check=True).stdout
+    return {path.decode("utf-8") for path in output.split(b"\x00") if path}
+
+def mod_status(directory: str, cache: StatCache, commit: str = "HEAD", workers: int | None = None) -> tuple[list[str], list[str], list[str]]:
+    """Compares the files of a mod directory in the working tree against a commit. Files git stores through a clean
+    filter, such as git lfs pointers, or with line ending conversion are hashed by git so they compare correctly.
+
+    Parameters
+    ----------
+    directory : str
+        The mod directory, e.g. Mods/GenericMod
+    cache : StatCache
+        The stat cache to look up and store hashes in
+    commit : str, optional
+        The commit to compare against, by default "HEAD"
+    workers : int | None, optional
+        Number of threads hashing files at once, by default None
+
+    Returns
+    -------
+    tuple[list[str], list[str], list[str]]
+        The changed, added and removed files
+    """
+    tracked = {path: blob for path, blob, _ in list_files(commit, directory)}
+    ignored = find_ignored(directory)
+    hashes = cache.hash_files([path for path in walk_files(directory) if path not in ignored], workers)
+
+    changed = sorted(path for path, hash_ in hashes.items() if path in tracked and tracked[path] != hash_)
+    added = sorted(path for path in hashes if path not in tracked)
+    removed = sorted(path for path in tracked if path not in hashes)
+    return changed, added, removed
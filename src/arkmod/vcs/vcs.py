@@ -5,7 +5,10 @@ import shutil
 
 from . import gitcommands
 from .gitinfo import GitInfo
-from .arkconfig import ArkModConfig, pass_arkmod_data
+from .moddb import ModDatabase
+from .release import ReleasePackager, RELEASES_DIR, parse_version, is_version
+from .status import StatCache, mod_status
+from .arkconfig import ArkModConfig, pass_arkmod_data, requires_arkmod, holds_config_lock
 from ..console import log_error, log_info
 from .gittransaction import GitTransaction
 
@@ -128,6 +131,7 @@ def current_mod():
 @click.option("--no-readme", '-xr',
                 is_flag = True,
                 help="Do not include the default README.md that is created with every mod.")
+@holds_config_lock()
 @pass_arkmod_data()
 def create_mod(name: str,
                 mod_directory: str,
@@ -162,6 +166,8 @@ def create_mod(name: str,
         if remote:
             if not transaction.execute(gitcommands.CreateRemote(f"origin_{mod_dir}", remote)):
                 return log_error(f"Error creating remote origin for mod {name}. Ensure that your git URL is valid and try again.")
+            if not transaction.execute(gitcommands.FetchRemote(f"origin_{mod_dir}")):
+                return log_error(f"Could not fetch remote origin for mod {name}. Ensure that your git URL is valid and try again.")
             if not transaction.execute(gitcommands.SetBranchRemote(mod_dir, f"origin_{mod_dir}", remote_branch)):
                 return log_error(f"Could not set remote branch for mod {name}. Ensure that the local and remote branch names are accurate then try again.")
 
@@ -183,15 +189,16 @@ def create_mod(name: str,
 
         log_info("Created necessary files")
 
-        arkmod_data["mods"].update({name: {
-            "directory": mod_dir,
-            "local-branch": mod_dir,
-            "remote-origin": f"origin_{name}" if remote else "",
-            "stable-release": None,
-            "next-release": {}
-        }})
-        arkmod_data["config"]["current-mod"] = name
-        ArkModConfig.save_configfile(arkmod_data)
+        def register_mod(data: dict) -> None:
+            data["mods"].update({name: {
+                "directory": mod_dir,
+                "local-branch": mod_dir,
+                "remote-origin": f"origin_{name}" if remote else "",
+                "stable-release": None,
+                "next-release": {}
+            }})
+            data["config"]["current-mod"] = name
+        ArkModConfig.update_configfile(register_mod, "Added additional mods to .arkmod config.")
         #ModDatabase(current_arkmod_data["config"]["mod-db"]).create_mod(name, mod_dir, default_maps=[file.split('.')[0] for file in to_add if file.endswith('umap')] if not no_copy else [])
 
         transaction.set_success()
@@ -201,23 +208,49 @@ def create_mod(name: str,
 
 @click.command("edit-mod")
 @click.argument("mod")
-@pass_arkmod_data()
-def edit_mod(mod: str,
-                arkmod_data: dict):
+@requires_arkmod()
+@holds_config_lock()
+def edit_mod(mod: str):
 
     # Checkout mod git branch
-    if not gitcommands.CheckoutBranch(arkmod_data["mods"][mod]["local-branch"]).execute():
+    if (mod_data := ArkModConfig.get_mod(mod)) is None or not gitcommands.CheckoutBranch(mod_data["local-branch"]).execute():
         return log_error(f"{mod} is not a valid mod. See arkmod create-mod --help for more info.")
-    arkmod_data["config"]["current-mod"] = mod
-    ArkModConfig.save_configfile(arkmod_data)
+    ArkModConfig.update_configfile(lambda data: data["config"].update({"current-mod": mod}), f"Switched to editing {mod}.")
+
+def __next_version(mod_data: dict) -> str:
+    """Works out the next release version of a mod, bumping the patch number of its latest release
+    """
+    if isinstance(mod_data.get("next-release"), str) and mod_data["next-release"]:
+        return mod_data["next-release"]
+    if not (releases := mod_data.get("releases")):
+        return "1.0.0"
+    if (latest := max(parse_version(v) for v in releases)) == (-1, -1, -1):
+        return "1.0.0"
+    major, minor, patch = latest
+    return f"{major}.{minor}.{patch + 1}"
 
 @click.command("create-release")
 @click.argument("name")
 @click.option('--manual-version', '-v',
                 default="",
                 help="Manually specifies the version in the form x.x.x")
+@click.option("--output", '-o',
+                default=RELEASES_DIR,
+                help="Directory the release archive and manifest are written to. Defaults to a directory inside .git, outside the working tree")
+@click.option("--workers", '-j',
+                type=int,
+                default=None,
+                help="Number of threads compressing the release. Defaults to the number of CPUs")
+@click.option("--no-package", '-xp',
+                is_flag = True,
+                help="Only create the release branch, without packaging an archive")
+@holds_config_lock()
+@pass_arkmod_data()
 def create_release(name: str,
                     manual_version: str,
+                    output: str,
+                    workers: int,
+                    no_package: bool,
                     arkmod_data: dict):
     """Create a new release for the mod you are working on.
 
@@ -225,46 +258,123 @@ def create_release(name: str,
     changed later.
     """
 
-    if not arkmod_data:
-        return log_error("You must initialise arkmod using 'arkmod init' before creating any releases. See arkmod --help for more info.")
+    if (current_mod := arkmod_data["config"]["current-mod"]) is None:
+        return log_error("You must be editing a mod to create a release. See arkmod edit-mod --help for more info.")
 
-    current_mod = arkmod_data["config"]["current-mod"]
-    mod_branch = arkmod_data["mods"][current_mod]["local-branch"]
-    mod_version = manual_version or arkmod_data["mods"][current_mod]["next-release"]
+    mod_data = arkmod_data["mods"][current_mod]
+    mod_branch = mod_data["local-branch"]
+    releases = mod_data.get("releases", {})
+    mod_version = manual_version or __next_version(mod_data)
 
-    if mod_version in arkmod_data["mods"][current_mod]["releases"]:
+    if not is_version(mod_version):
+        return log_error(f"{mod_version} is not a valid version. Versions must be in the form x.x.x, e.g. 1.2.0")
+
+    if mod_version in releases:
         return log_error(f"There is already an active release version with the tag {mod_version}")
 
     # Create new branch for the release
-    if not gitcommands.CreateBranch(f"{mod_branch}-release-{mod_version}", from_=mod_branch).execute():
+    release_branch = f"{mod_branch}-release-{mod_version}"
+    if not gitcommands.CreateBranch(release_branch, from_=mod_branch).execute():
         return log_error(f"Could not create new branch for release {mod_version}")
 
     log_info("Created branch")
 
+    release = {"name": name, "branch": release_branch}
+    if not no_package:
+        # Only files changed since the latest release are compressed again
+        previous = max(releases.items(), key=lambda r: parse_version(r[0]), default=(None, {}))[1]
+        archive, manifest, changed = ReleasePackager(output, workers).package(
+            release_branch, f"Mods/{mod_data['directory']}", f"{mod_data['directory']}-{mod_version}", previous.get("manifest"))
+        release.update({"archive": archive, "manifest": manifest})
+        log_info(f"Packaged {archive} ({len(changed)} files changed since the last release)")
+
+    ArkModConfig.update_configfile(lambda data: data["mods"][current_mod].setdefault("releases", {}).update({mod_version: release}),
+                                    f"Created release {mod_version} of {current_mod}.")
+
 
 @click.command("set-remote")
 @click.argument("mod")
 @click.argument("remote-url")
 @click.option("--remote-branch", '-rb',
                 default="main")
-@pass_arkmod_data()
+@holds_config_lock()
+@requires_arkmod()
 def set_remote(mod: str,
                 remote_url: str,
-                remote_branch: str,
-                arkmod_data: dict) -> None:
+                remote_branch: str) -> None:
+
+    if ArkModConfig.get_mod(mod) is None:
+        return log_error(f"{mod} is not a valid mod. See arkmod create-mod --help for more info.")
 
     # Create remote and set it on local branch
     with GitTransaction(auto_rollback=True) as transaction:
         if not transaction.execute(gitcommands.CreateRemote(f"origin_{mod}", remote_url)):
             return log_error(f"Could not create remote origin_{mod} at {remote_url}")
+        if not transaction.execute(gitcommands.FetchRemote(f"origin_{mod}")):
+            return log_error(f"Could not fetch remote origin_{mod} at {remote_url}")
         if not transaction.execute(gitcommands.SetBranchRemote(mod, f"origin_{mod}", remote_branch)):
             return log_error(f"Could not set remote as origin_{mod}/{remote_branch}")
 
         transaction.set_success()
 
     # Update mod data in config file
-    arkmod_data["mods"][mod]["remote-origin"] = f"origin_{mod}"
-    ArkModConfig.save_configfile(arkmod_data)
+    ArkModConfig.update_configfile(lambda data: data["mods"][mod].update({"remote-origin": f"origin_{mod}"}), f"Set remote of {mod}.")
+
+
+@click.command("sync-mod-db")
+@pass_arkmod_data()
+def sync_mod_db(arkmod_data: dict):
+    """Add every mod registered with arkmod that is missing from the devkit's Mods.db, in a single write
+    """
+    if not os.path.isfile(arkmod_data["config"]["mod-db"]):
+        return log_error(f"Could not find Mods.db at {arkmod_data['config']['mod-db']}")
+
+    added, updated = ModDatabase(arkmod_data["config"]["mod-db"]).reconcile(arkmod_data)
+    log_info(f"Added {len(added)} and updated {len(updated)} mods in {arkmod_data['config']['mod-db']}")
+
+
+@click.command("status")
+@click.argument("mods", nargs=-1)
+@click.option("--all", '-a', "all_mods",
+                is_flag = True,
+                help="Show the status of every registered mod")
+@click.option("--workers", '-j',
+                type=int,
+                default=None,
+                help="Number of files to hash at once")
+@pass_arkmod_data()
+def status(mods: tuple[str],
+            all_mods: bool,
+            workers: int,
+            arkmod_data: dict):
+    """List the files that have changed (M), been added (A) or removed (D) in a mod since the last commit.
+
+    MODS are the mods to check, defaulting to the mod currently being edited. Files are only hashed again when their
+    size, modification time or inode change.
+    """
+    if all_mods:
+        mods = tuple(arkmod_data["mods"])
+    elif not mods:
+        if arkmod_data["config"]["current-mod"] is None:
+            return log_error("You are not editing a mod. Specify the mods to check or use --all.")
+        mods = (arkmod_data["config"]["current-mod"],)
+
+    if (unknown := [mod for mod in mods if mod not in arkmod_data["mods"]]):
+        return log_error(f"{', '.join(unknown)} are not registered mods. See arkmod list-mods for the available mods.")
+
+    cache = StatCache()
+    current_branch = GitInfo.get_current_branch()
+    for mod in mods:
+        # Only the working tree of the branch that is checked out can be compared
+        if (branch := arkmod_data["mods"][mod].get("local-branch")) is not None and branch != current_branch:
+            log_error(f"{mod} is not checked out. Switch to it with 'arkmod edit-mod {mod}' to see its status.")
+            continue
+        changed, added, removed = mod_status(f"Mods/{arkmod_data['mods'][mod]['directory']}", cache, workers=workers)
+        click.echo(f"{mod}: {len(changed)} changed, {len(added)} added, {len(removed)} removed")
+        for flag, paths in (("M", changed), ("A", added), ("D", removed)):
+            for path in paths:
+                click.echo(f"  {flag} {path}")
+    cache.save()
 
 
 def __detach_discard():
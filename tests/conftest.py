@@ -0,0 +1,251 @@
+import os
+import time
+import struct
+import subprocess
+import pytest
+
+from arkmod.vcs.arkconfig import ArkModConfig, dumps_config
+
+UMAP_MAGIC_NUMBER = 2653586369
+
+
+class PackageBuilder:
+    """Writes minimal .umap/.uasset packages containing just a name, import and export table plus raw export data
+    """
+
+    def __init__(self) -> None:
+        self.names = ["None"]
+        self.imports = []
+        self.exports = []
+
+    def name(self, name: str) -> int:
+        if name not in self.names:
+            self.names.append(name)
+        return self.names.index(name)
+
+    def add_import(self, class_name: str, object_name: str, outer: int = 0, class_package: str = "/Script/CoreUObject") -> int:
+        self.imports.append((self.name(class_package), 0, self.name(class_name), 0, outer & 0xFFFFFFFF, self.name(object_name), 0))
+        return -len(self.imports)
+
+    def add_package_import(self, package_path: str) -> int:
+        return self.add_import("Package", package_path)
+
+    def add_export(self, object_name: str, payload: bytes = b"", outer: int = 0, number: int = 0, class_index: int = 0) -> int:
+        self.exports.append([self.name(object_name), outer & 0xFFFFFFFF, number, payload, class_index & 0xFFFFFFFF])
+        return len(self.exports)
+
+    def add_actor(self, object_name: str, class_name: str, properties: list[tuple], number: int = 0, outer: int = 0) -> int:
+        """Adds an export of an imported class whose data is a tagged property stream of (name, type, value) tuples
+        """
+        return self.add_export(object_name, self.properties(properties), outer, number, self.add_import("Class", class_name))
+
+    def properties(self, properties: list[tuple]) -> bytes:
+        stream = b""
+        for name, type_, value in properties:
+            tag = struct.pack("<4I", self.name(name), 0, self.name(type_), 0)
+            match type_:
+                case "BoolProperty":
+                    stream += tag + struct.pack("<ii?", 0, 0, value)
+                    continue
+                case "IntProperty":
+                    data = struct.pack("<i", value)
+                case "FloatProperty":
+                    data = struct.pack("<f", value)
+                case "NameProperty":
+                    data = struct.pack("<II", self.name(value), 0)
+                case _:
+                    data = value
+            stream += tag + struct.pack("<ii", len(data), 0) + data
+        return stream + struct.pack("<II", self.name("None"), 0)
+
+    def build(self) -> bytes:
+        names = b"".join(struct.pack("<i", len(n) + 1) + n.encode() + b"\x00" for n in self.names)
+
+        names_offset = 65
+        imports_offset = names_offset + len(names)
+        exports_offset = imports_offset + 28 * len(self.imports)
+        data_offset = exports_offset + 68 * len(self.exports)
+
+        header = struct.pack("<III", UMAP_MAGIC_NUMBER, 0, 0).ljust(41, b"\x00")
+        header += struct.pack("<6I", len(self.names), names_offset, len(self.exports), exports_offset, len(self.imports), imports_offset)
+
+        imports = b"".join(struct.pack("<7I", *imp) for imp in self.imports)
+
+        exports, payloads = b"", b""
+        for name, outer, number, payload, class_index in self.exports:
+            fields = [class_index, 0, outer, name, number, 0, len(payload), data_offset + len(payloads)] + [0] * 9
+            exports += struct.pack("<17I", *fields)
+            payloads += payload
+
+        return header + names + imports + exports + payloads
+
+    def write(self, path) -> str:
+        with open(path, "wb") as f:
+            f.write(self.build())
+        return str(path)
+
+
+@pytest.fixture()
+def package_builder():
+    return PackageBuilder
+
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark-sizes",
+                        default="1,8",
+                        help="Comma separated numbers of mods to run the VCS benchmarks against, e.g. 1,10,100")
+    parser.addoption("--benchmark-files",
+                        default="1,16",
+                        help="Comma separated numbers of files per mod to run the VCS benchmarks against, e.g. 1,100,1000")
+
+def pytest_generate_tests(metafunc):
+    if "benchmark_sizes" in metafunc.fixturenames:
+        sizes = [int(n) for n in metafunc.config.getoption("--benchmark-sizes").split(",")]
+        metafunc.parametrize("benchmark_sizes", [sizes])
+    if "files_per_mod" in metafunc.fixturenames:
+        files = [int(n) for n in metafunc.config.getoption("--benchmark-files").split(",")]
+        metafunc.parametrize("files_per_mod", files)
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not (results := getattr(config, "benchmark_results", None)):
+        return
+    terminalreporter.write_sep("-", "arkmod vcs benchmarks")
+    terminalreporter.write_line(f"{'command':<20}{'mods':>8}{'files/mod':>12}{'seconds':>12}{'git processes':>16}")
+    for command, mods, files, seconds, processes in results:
+        terminalreporter.write_line(f"{command:<20}{mods:>8}{files:>12}{seconds:>12.3f}{processes:>16}")
+
+
+class GitProcessCounter(subprocess.Popen):
+    """Drop in for subprocess.Popen that counts every git process started, whether through a shell command or not
+    """
+
+    count = 0
+
+    def __init__(self, args, *a, **kw):
+        if (args if isinstance(args, str) else " ".join(map(str, args))).startswith("git"):
+            GitProcessCounter.count += 1
+        super().__init__(args, *a, **kw)
+
+    @staticmethod
+    def measure(func: callable) -> tuple[float, int, object]:
+        """Runs a function, returning how long it took, how many git processes it started and its result
+        """
+        GitProcessCounter.count = 0
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, GitProcessCounter.count, result
+
+
+def git(*args: str) -> None:
+    subprocess.run(["git", *args], check=True, stdout=subprocess.DEVNULL)
+
+
+class ArkmodRepoFactory:
+
+    TEMPLATE_FILES = ("GenericMod.umap", "PrimalGameData_BP_GenericMod.uasset", "TestGameMode_GenericMod.uasset")
+
+    def __init__(self, tmp_path_factory, monkeypatch) -> None:
+        """Builds throwaway arkmod repositories, each with a number of registered mods and a bare local remote per mod
+        """
+        self.tmp_path_factory = tmp_path_factory
+        self.monkeypatch = monkeypatch
+
+    def write_files(self, directory: str, names: list[str]) -> None:
+        os.makedirs(directory, exist_ok=True)
+        for name in names:
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(name.encode() * 64)
+
+    def build(self, mods: int, files_per_mod: int = 3, remotes: bool = True) -> dict:
+        """Creates a repository and changes into it
+
+        Parameters
+        ----------
+        mods : int
+            Number of mods, each on its own branch and registered in .arkmod
+        files_per_mod : int, optional
+            Number of committed files within each mod directory, by default 3
+        remotes : bool, optional
+            Create a bare repository per mod with the mod branch pushed to main, by default True
+
+        Returns
+        -------
+        dict
+            The `root` of the repository, the `mod-db` path and the `remotes` by mod name
+        """
+        root = self.tmp_path_factory.mktemp("arkmod")
+        remote_dir = self.tmp_path_factory.mktemp("remotes")
+        self.monkeypatch.chdir(root)
+
+        git("init", "-q", "-b", "master")
+        with open("Mods.db", "w") as f:
+            f.write('{"Mods": []}')
+        self.write_files(os.path.join("Mods", "GenericMod"), self.TEMPLATE_FILES)
+
+        ArkModConfig.init_configfile(db="Mods.db")
+        data = ArkModConfig.load_configfile(use_cache=False)
+        data["config"]["copyfiles"] = {
+            f"Mods/GenericMod/{file}": f"Mods/<ArkMod:ModName>/{file.replace('GenericMod', '<ArkMod:ModName>')}"
+            for file in self.TEMPLATE_FILES
+        }
+        git("add", "-A")
+        git("commit", "-q", "-m", "Initial Commit")
+
+        repo_remotes = {}
+        for i in range(mods):
+            name = f"Mod{i}"
+            git("checkout", "-q", "-b", name, "master")
+            self.write_files(os.path.join("Mods", name), [f"Asset{j}.uasset" for j in range(files_per_mod)])
+            git("add", "-A")
+            git("commit", "-q", "-m", f"Create {name}")
+            if remotes:
+                repo_remotes[name] = str(remote_dir / f"{name}.git")
+                git("init", "-q", "--bare", repo_remotes[name])
+                git("push", "-q", repo_remotes[name], f"{name}:main")
+
+            data["mods"][name] = {
+                "directory": name,
+                "local-branch": name,
+                "remote-origin": "",
+                "stable-release": None,
+                "next-release": {}
+            }
+
+        git("checkout", "-q", "master")
+        with open(".arkmod", "w") as f:
+            f.write(dumps_config(data))
+        git("commit", "-q", "-m", "Register mods", ".arkmod")
+
+        return {"root": root, "mod-db": "Mods.db", "remotes": repo_remotes}
+
+
+@pytest.fixture()
+def git_identity(monkeypatch):
+    """Lets git commit without a user configured on the machine running the tests
+    """
+    for var in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(var, "arkmod")
+    for var in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(var, "arkmod@example.com")
+
+@pytest.fixture()
+def arkmod_repo_factory(tmp_path_factory, monkeypatch, git_identity):
+    return ArkmodRepoFactory(tmp_path_factory, monkeypatch)
+
+@pytest.fixture()
+def git_processes(monkeypatch):
+    monkeypatch.setattr(subprocess, "Popen", GitProcessCounter)
+    return GitProcessCounter
+
+@pytest.fixture()
+def commit_files():
+    def commit_files(files: dict):
+        """Writes the given files and commits everything in the working tree
+        """
+        for path, data in files.items():
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        subprocess.run(["git", "add", "-A"], check=True)
+        subprocess.run(["git", "-c", "user.name=arkmod", "-c", "user.email=arkmod@example.com", "commit", "-q", "-m", "Update"], check=True)
+    return commit_files
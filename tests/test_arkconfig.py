@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import arkmod
+from arkmod.vcs.arkconfig import ArkModConfig, dumps_config
+
+
+@pytest.fixture()
+def arkmod_repo(arkmod_repo_factory):
+    return arkmod_repo_factory.build(mods=0, remotes=False)["root"]
+
+
+def test_config_layout():
+    data = {"config": {"git-base": "master"}, "mods": {"A \"quoted\" mod": {"directory": "A"}, "B": {"directory": "B"}}}
+    text = dumps_config(data)
+
+    assert json.loads(text) == data
+    assert '    "B": {"directory": "B"}\n' in text
+    assert json.loads(dumps_config({"config": {}, "mods": {}})) == {"config": {}, "mods": {}}
+
+
+def test_get_mod(arkmod_repo):
+    ArkModConfig.update_configfile(lambda data: data["mods"].update({"A,B": {"directory": "A"}, "C": {"directory": "C"}}))
+
+    assert ArkModConfig.get_mod("A,B") == {"directory": "A"}
+    assert ArkModConfig.get_mod("C") == {"directory": "C"}
+    assert ArkModConfig.get_mod("D") is None
+    for key in ("git-base", "from-existing", "copyfiles", "mods"):
+        assert ArkModConfig.get_mod(key) is None
+
+
+def test_save_configfile_keeps_other_mods(arkmod_repo):
+    stale = ArkModConfig.load_configfile(use_cache=False)
+    ArkModConfig.update_configfile(lambda data: data["mods"].update({"A": {"directory": "A"}}))
+
+    stale["mods"]["B"] = {"directory": "B"}
+    with pytest.deprecated_call():
+        ArkModConfig.save_configfile(stale)
+
+    assert sorted(ArkModConfig.load_configfile()["mods"]) == ["A", "B"]
+
+
+def test_concurrent_updates(arkmod_repo):
+    def register(i):
+        ArkModConfig.update_configfile(lambda data: data["mods"].update({f"Mod{i}": {"directory": f"Mod{i}"}}))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(register, range(8)))
+
+    assert sorted(ArkModConfig.load_configfile()["mods"]) == [f"Mod{i}" for i in range(8)]
+    assert subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True).stdout == ""
+
+
+def test_parallel_create_mod(arkmod_repo_factory):
+    arkmod_repo_factory.build(mods=0, remotes=False)
+    env = {**os.environ, "PYTHONPATH": os.path.dirname(os.path.dirname(arkmod.__file__))}
+
+    procs = [subprocess.Popen([sys.executable, "-m", "arkmod.arkmod", "create-mod", f"M{i}"], env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True) for i in range(4)]
+    outputs = [proc.communicate()[0] for proc in procs]
+    assert all(proc.returncode == 0 and "[Error]" not in output for proc, output in zip(procs, outputs)), outputs
+
+    config = json.loads(subprocess.run(["git", "show", "master:.arkmod"], capture_output=True, text=True, check=True).stdout)
+    assert sorted(config["mods"]) == [f"M{i}" for i in range(4)]
+    for i in range(4):
+        files = subprocess.run(["git", "ls-tree", "-r", "--name-only", f"M{i}", "Mods"], capture_output=True, text=True, check=True).stdout.split()
+        assert sorted(files) == sorted(f for f in files if f.startswith(("Mods/GenericMod/", f"Mods/M{i}/"))) and f"Mods/M{i}/M{i}.umap" in files
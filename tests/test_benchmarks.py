@@ -0,0 +1,57 @@
+import subprocess
+
+from click.testing import CliRunner
+
+from arkmod.arkmod import cli
+from arkmod.vcs.arkconfig import ArkModConfig
+
+
+def run_cli(*args: str):
+    def run():
+        result = CliRunner().invoke(cli, args, catch_exceptions=False)
+        assert "[Error]" not in result.output, result.output
+        return result
+    return run
+
+def run_update_configfile():
+    ArkModConfig.update_configfile(lambda data: data["config"].update({"current-mod": "Mod0"}))
+
+COMMANDS = {
+    "create-mod": lambda repo: run_cli("create-mod", "New Mod"),
+    "edit-mod": lambda repo: run_cli("edit-mod", "Mod0"),
+    "set-remote": lambda repo: run_cli("set-remote", "Mod0", repo["remotes"]["Mod0"]),
+    "update-configfile": lambda repo: run_update_configfile,
+}
+
+
+def record(request, *result) -> None:
+    if not hasattr(request.config, "benchmark_results"):
+        request.config.benchmark_results = []
+    request.config.benchmark_results.append(result)
+
+
+def test_vcs_scaling(request, arkmod_repo_factory, git_processes, benchmark_sizes, files_per_mod):
+    """Runs every VCS command against repositories with a growing number of mods, each holding `files_per_mod` files.
+    The number of git processes each command starts must not grow with the number of mods, while the wall times are
+    reported in the terminal summary.
+    """
+    for command, make in COMMANDS.items():
+        counts = []
+        for mods in benchmark_sizes:
+            repo = arkmod_repo_factory.build(mods=max(mods, 1), files_per_mod=files_per_mod)
+            seconds, processes, _ = git_processes.measure(make(repo))
+            record(request, command, mods, files_per_mod, seconds, processes)
+            counts.append(processes)
+
+        assert counts[-1] <= counts[0], f"{command} started {counts} git processes for {benchmark_sizes} mods"
+
+
+def test_init(request, tmp_path, monkeypatch, git_identity, git_processes):
+    """Times 'arkmod init' on its own, as a new repository has no mods for it to scale with
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "Mods.db").write_text('{"Mods": []}')
+
+    seconds, processes, _ = git_processes.measure(run_cli("init", "--mod-db", "Mods.db"))
+    record(request, "init", 0, 0, seconds, processes)
+    assert subprocess.run(["git", "show", "HEAD:.arkmod"], capture_output=True).returncode == 0
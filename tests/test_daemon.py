@@ -0,0 +1,112 @@
+import time
+import socket
+import threading
+import subprocess
+
+import pytest
+
+from arkmod import daemon
+from arkmod.assets import index
+from arkmod.vcs.arkconfig import ArkModConfig, dumps_config
+from arkmod.assets.index import LevelIndex, get_mod_levels
+
+
+def wait_for(check, timeout=10):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if check():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def write_repo(tmp_path, monkeypatch, package_builder):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(daemon.PollingWatcher.__init__, "__defaults__", (0.1,))
+    subprocess.run(["git", "init", "-q"], check=True)
+
+    ArkModConfig.init_configfile(db="Mods.db")
+    data = ArkModConfig.load_configfile(use_cache=False)
+    data["mods"]["Cave Mod"] = {"directory": "Cave"}
+    (tmp_path / ".arkmod").write_text(dumps_config(data))
+
+    (tmp_path / "Mods" / "Cave").mkdir(parents=True)
+    def write_level(land_only):
+        builder = package_builder()
+        builder.add_actor("SpawnZone", "SpawnZone", [("bOnlyCountLandDinos", "BoolProperty", land_only)])
+        builder.write(tmp_path / "Mods" / "Cave" / "Cave.umap")
+    write_level(True)
+    with LevelIndex() as level_index:
+        level_index.build(get_mod_levels(data))
+    return write_level
+
+
+@pytest.mark.parametrize("poll", [False, True])
+def test_daemon(tmp_path, monkeypatch, package_builder, poll):
+    write_level = write_repo(tmp_path, monkeypatch, package_builder)
+
+    server = threading.Thread(target=daemon.serve, args=(".", poll), daemon=True)
+    server.start()
+    assert wait_for(lambda: (tmp_path / daemon.SOCKET_FILE).exists())
+    time.sleep(0.2)
+
+    def query():
+        return daemon.call({"args": ["index", "query", "-p", "bOnlyCountLandDinos", "-v", "true"]})["output"]
+
+    try:
+        assert daemon.call({"args": ["list-mods"]}) == {"output": "Cave Mod\n", "exit-code": 0}
+        assert query() == "Cave Mod: Mods/Cave/Cave.umap: SpawnZone_0\n"
+        assert daemon.call({"args": ["daemon", "stop"]})["exit-code"] == 1
+        assert daemon.call({"args": ["lint", "Missing Mod"]})["exit-code"] == 1
+        # Errors that are not click's own are still answered, with the traceback as the output
+        reply = daemon.call({"args": ["umap", "diff", ".arkmod", ".arkmod"]})
+        assert reply["exit-code"] == 1 and "Traceback" in reply["output"]
+
+        write_level(False)
+        assert wait_for(lambda: query() == "")
+    finally:
+        daemon.call({"control": "stop"})
+        server.join(5)
+
+
+def test_queries_run_during_reindex(tmp_path, monkeypatch, package_builder):
+    write_level = write_repo(tmp_path, monkeypatch, package_builder)
+    state = daemon.DaemonState(str(tmp_path), poll=True)
+
+    reading, release = threading.Event(), threading.Event()
+    read_level_rows = index.read_level_rows
+    def slow_read_level_rows(path):
+        reading.set()
+        release.wait(10)
+        return read_level_rows(path)
+    monkeypatch.setattr(index, "read_level_rows", slow_read_level_rows)
+
+    write_level(False)
+    refresh = threading.Thread(target=state.invalidate, args=({str(tmp_path / "Mods" / "Cave" / "Cave.umap")},))
+    refresh.start()
+    try:
+        assert reading.wait(10)
+        # The level is still being read, so the query answers straight away with the last indexed state
+        start = time.monotonic()
+        assert state.run(["index", "query", "-p", "bOnlyCountLandDinos", "-v", "true"]) == ("Cave Mod: Mods/Cave/Cave.umap: SpawnZone_0\n", 0)
+        assert time.monotonic() - start < 5
+    finally:
+        release.set()
+        refresh.join(10)
+
+    assert state.run(["index", "query", "-p", "bOnlyCountLandDinos", "-v", "true"]) == ("", 0)
+
+
+def test_call_without_reply(tmp_path):
+    path = str(tmp_path / "arkmod.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(path)
+        server.listen(1)
+        def hang_up():
+            conn, _ = server.accept()
+            conn.recv(1024)
+            conn.close()
+        threading.Thread(target=hang_up, daemon=True).start()
+
+        with pytest.raises(OSError):
+            daemon.call({"args": ["list-mods"]}, path=path, timeout=5)
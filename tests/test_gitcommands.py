@@ -1,19 +1,37 @@
 import os
 import pytest
-import shutil
+import subprocess
 
 from arkmod.vcs import gitcommands
+from arkmod.vcs.gitinfo import GitInfo
 
-os.chdir(".\\test_environment")
 
 @pytest.fixture()
-def git_repo():
-    if os.path.isdir(".git"):
-        shutil.rmtree(".git")
-    assert 1 == 0
-    os.system("git init")
-    print(os.listdir("."))
-    assert 1 == 0
-
-def test_git_add(git_reset):
-    gitcommands.Add("test_gitcommands.py")
+def git_repo(arkmod_repo_factory):
+    return arkmod_repo_factory.build(mods=1, remotes=False)
+
+def test_git_add(git_repo):
+    with open("test_gitcommands.py", "w") as f:
+        f.write("")
+
+    assert gitcommands.Add(("test_gitcommands.py",)).execute()
+    assert subprocess.run(["git", "diff", "--cached", "--name-only"], capture_output=True, text=True).stdout == "test_gitcommands.py\n"
+
+def test_git_commit(git_repo):
+    with open("Mods.db", "w") as f:
+        f.write('{"Mods": [{}]}')
+
+    previous = GitInfo.get_current_commit_hash()
+    assert gitcommands.Commit(("Mods.db",), "Update Mods.db").execute()
+    assert GitInfo.get_current_commit_hash() != previous
+
+def test_create_and_checkout_branch(git_repo):
+    assert gitcommands.CreateBranch("Mod1", from_="master").execute()
+    assert GitInfo.get_current_branch() == "Mod1"
+
+    checkout = gitcommands.CheckoutBranch("Mod0")
+    assert checkout.execute()
+    assert os.path.isdir(os.path.join("Mods", "Mod0"))
+
+    checkout.rollback()
+    assert GitInfo.get_current_branch() == "Mod1"
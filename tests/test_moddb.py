@@ -0,0 +1,35 @@
+import json
+
+from arkmod.vcs.moddb import ModDatabase
+
+
+def test_batched_writes(tmp_path, monkeypatch):
+    path = tmp_path / "Mods.db"
+    path.write_text(json.dumps({"Mods": [{"ModDir": "Existing", "Title": "Old Title", "Maps": []}]}))
+
+    writes = []
+    db = ModDatabase(str(path))
+    monkeypatch.setattr(db, "write_data", lambda original=db.write_data: (writes.append(1), original()))
+
+    with db:
+        for i in range(5):
+            db.create_mod(f"Mod {i}", f"Mod_{i}", [f"Mod_{i}"])
+        db.update_mod("Existing", Title="New Title")
+        assert not writes
+
+    assert len(writes) == 1
+    assert db.get_mod(title="New Title")["ModDir"] == "Existing"
+    assert len(ModDatabase(str(path)).data["Mods"]) == 6
+
+
+def test_reconcile(tmp_path):
+    path = tmp_path / "Mods.db"
+    path.write_text(json.dumps({"Mods": [{"ModDir": "A", "Title": "Renamed"}]}))
+    arkmod_data = {"mods": {"A": {"directory": "A"}, "B Mod": {"directory": "B_Mod"}}}
+
+    assert ModDatabase(str(path)).reconcile(arkmod_data) == (["B Mod"], ["A"])
+    assert ModDatabase(str(path)).reconcile(arkmod_data) == ([], [])
+
+    db = ModDatabase(str(path))
+    assert db.get_mod(mod_dir="B_Mod")["Maps"] == ["B_Mod"]
+    assert [m["Title"] for m in db.data["Mods"]] == ["A", "B Mod"]
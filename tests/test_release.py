@@ -0,0 +1,63 @@
+import os
+import json
+import tarfile
+import subprocess
+
+from click.testing import CliRunner
+
+from arkmod.arkmod import cli
+from arkmod.vcs import release
+from arkmod.vcs.release import ReleasePackager, parse_version
+
+
+def test_package_release(tmp_path, monkeypatch, git_processes, commit_files):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(release, "CHUNK_SIZE", 1000)
+    subprocess.run(["git", "init", "-q"], check=True)
+
+    files = {
+        "Mods/Cave/Cave.umap": os.urandom(5000),
+        "Mods/Cave/Empty.uasset": b"",
+        "Mods/Cave/Sub/Data.uasset": b"data" * 300,
+        "Mods/Other/Other.umap": b"not packaged",
+    }
+    commit_files(files)
+
+    packager = ReleasePackager(str(tmp_path / "Releases"), workers=3)
+    seconds, processes, (archive, manifest, changed) = git_processes.measure(lambda: packager.package("HEAD", "Mods/Cave", "Cave-1.0.0"))
+    assert len(changed) == 3
+    # ls-tree, a single cat-file streaming every blob, then show and rev-parse for the manifest
+    assert processes == 4
+
+    with tarfile.open(archive) as tar:
+        assert sorted(tar.getnames()) == ["Mods/Cave/Cave.umap", "Mods/Cave/Empty.uasset", "Mods/Cave/Sub/Data.uasset"]
+        for name in tar.getnames():
+            assert tar.extractfile(name).read() == files[name]
+
+    commit_files({"Mods/Cave/Sub/Data.uasset": b"changed"})
+    archive, _, changed = packager.package("HEAD", "Mods/Cave", "Cave-1.0.1", manifest)
+    assert changed == ["Mods/Cave/Sub/Data.uasset"]
+    assert len(os.listdir(tmp_path / "Releases" / ".objects")) == 4
+
+    with tarfile.open(archive) as tar:
+        assert tar.extractfile("Mods/Cave/Sub/Data.uasset").read() == b"changed"
+        assert tar.extractfile("Mods/Cave/Cave.umap").read() == files["Mods/Cave/Cave.umap"]
+
+
+def test_create_release(arkmod_repo_factory):
+    arkmod_repo_factory.build(mods=1, remotes=False)
+    runner = CliRunner()
+    runner.invoke(cli, ["edit-mod", "Mod0"], catch_exceptions=False)
+
+    result = runner.invoke(cli, ["create-release", "Broken", "-v", "1.1.0-rc"], catch_exceptions=False)
+    assert "not a valid version" in result.output
+    for _ in range(2):
+        assert "[Error]" not in runner.invoke(cli, ["create-release", "Next"], catch_exceptions=False).output
+
+    with open(".arkmod") as f:
+        releases = json.load(f)["mods"]["Mod0"]["releases"]
+    assert sorted(releases) == ["1.0.0", "1.0.1"]
+    assert os.path.isfile(releases["1.0.1"]["archive"])
+    assert subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True).stdout == ""
+    assert parse_version("1.1.0-rc") == (1, 1, 0)
+
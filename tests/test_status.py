@@ -0,0 +1,53 @@
+import os
+import subprocess
+
+from click.testing import CliRunner
+
+from arkmod.arkmod import cli
+from arkmod.vcs import status
+from arkmod.vcs.status import StatCache, mod_status
+
+
+def test_mod_status(tmp_path, monkeypatch, commit_files):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(status, "RACY_SECONDS", -1)
+    subprocess.run(["git", "init", "-q"], check=True)
+    commit_files({"Mods/Cave/Cave.umap": b"level", "Mods/Cave/Old.uasset": b"old", "Mods/Cave/Same.uasset": b"same"})
+
+    (tmp_path / "Mods" / "Cave" / "Cave.umap").write_bytes(b"changed level")
+    (tmp_path / "Mods" / "Cave" / "New.uasset").write_bytes(b"new")
+    os.remove(tmp_path / "Mods" / "Cave" / "Old.uasset")
+
+    (tmp_path / ".gitignore").write_text("*.bak\n")
+    (tmp_path / "Mods" / "Cave" / "Cave.umap.bak").write_bytes(b"backup")
+
+    cache = StatCache()
+    assert mod_status("Mods/Cave", cache) == (["Mods/Cave/Cave.umap"], ["Mods/Cave/New.uasset"], ["Mods/Cave/Old.uasset"])
+    cache.save()
+
+    hashed = []
+    monkeypatch.setattr(status, "hash_blob", lambda path, size: hashed.append(path))
+    assert mod_status("Mods/Cave", StatCache())[0] == ["Mods/Cave/Cave.umap"]
+    assert hashed == []
+
+
+def test_mod_status_filters(tmp_path, monkeypatch, commit_files):
+    monkeypatch.chdir(tmp_path)
+    subprocess.run(["git", "init", "-q"], check=True)
+    # Stands in for git lfs, storing something other than the raw file content
+    subprocess.run(["git", "config", "filter.upper.clean", "tr a-z A-Z"], check=True)
+    commit_files({".gitattributes": b"*.pointer filter=upper\n", "Mods/Cave/Cave.pointer": b"level", "Mods/Cave/Raw.uasset": b"raw"})
+
+    assert mod_status("Mods/Cave", StatCache()) == ([], [], [])
+    (tmp_path / "Mods" / "Cave" / "Cave.pointer").write_bytes(b"changed")
+    assert mod_status("Mods/Cave", StatCache()) == (["Mods/Cave/Cave.pointer"], [], [])
+
+
+def test_status_of_mod_not_checked_out(arkmod_repo_factory):
+    arkmod_repo_factory.build(mods=2, remotes=False)
+    runner = CliRunner()
+    runner.invoke(cli, ["edit-mod", "Mod0"], catch_exceptions=False)
+
+    output = runner.invoke(cli, ["status", "Mod0", "Mod1"], catch_exceptions=False).output
+    assert "Mod0: 0 changed, 0 added, 0 removed" in output
+    assert "Mod1 is not checked out" in output
@@ -0,0 +1,330 @@
+import io
+import os
+import json
+import struct
+import pytest
+
+from arkmod.umap import ArkPackage, UmapActor
+from arkmod.assets.resolver import PackageResolver
+from arkmod.assets.index import LevelIndex
+from arkmod.assets.lint import compile_schema, lint_levels
+from arkmod.assets.diff import diff_levels
+from arkmod.assets.patch import patch_levels, undo_patches
+from arkmod.assets import extract
+from arkmod.assets.extract import extract_levels
+from arkmod.assets.exporter import iter_records, write_jsonl, write_columnar
+
+
+def write_mod(tmp_path, package_builder):
+    mod = tmp_path / "Mods" / "GenericMod"
+    mod.mkdir(parents=True)
+
+    game_mode = package_builder()
+    game_mode.add_export("TestGameMode_GenericMod_C", b"\x01" * 8)
+    game_mode.write(mod / "TestGameMode_GenericMod.uasset")
+
+    game_data = package_builder()
+    package = game_data.add_package_import("/Game/Mods/GenericMod/TestGameMode_GenericMod")
+    game_data.add_import("BlueprintGeneratedClass", "TestGameMode_GenericMod_C", outer=package)
+    game_data.add_export("PrimalGameData_BP_GenericMod_C", b"\x02" * 8)
+    game_data.write(mod / "PrimalGameData_BP_GenericMod.uasset")
+
+    level = package_builder()
+    package = level.add_package_import("/Game/Mods/GenericMod/PrimalGameData_BP_GenericMod")
+    level.add_import("BlueprintGeneratedClass", "PrimalGameData_BP_GenericMod_C", outer=package)
+    level.add_import("Class", "Actor", outer=level.add_package_import("/Script/Engine"))
+    level.add_export("PersistentLevel", b"\x03" * 4)
+    level.write(mod / "GenericMod.umap")
+
+    return mod
+
+
+def test_package_tables(tmp_path, package_builder):
+    mod = write_mod(tmp_path, package_builder)
+    package = ArkPackage(os.path.join(mod, "GenericMod.umap"))
+
+    assert [e.get_object_name() for e in package.exports] == ["PersistentLevel_0"]
+    assert package.get_import_package(package.imports[1]) is package.imports[0]
+
+
+def test_resolve_import(tmp_path, package_builder):
+    resolver = PackageResolver(str(write_mod(tmp_path, package_builder)))
+    level = resolver.load("GenericMod")
+
+    resolved = resolver.resolve_all("GenericMod")
+    assert resolved[level.imports[1]].get_object_name() == "PrimalGameData_BP_GenericMod_C_0"
+    assert resolved[level.imports[0]] is None
+    assert resolved[level.imports[3]] is None
+
+
+def test_resolve_same_named_packages(tmp_path, package_builder):
+    mod = write_mod(tmp_path, package_builder)
+    (mod / "Maps").mkdir()
+    for directory, payload in ((mod, b"\x01"), (mod / "Maps", b"\x02")):
+        data = package_builder()
+        data.add_export("Data_C", payload * 4)
+        data.write(directory / "Data.uasset")
+    (mod / "Data.umap").write_bytes((mod / "Data.uasset").read_bytes())
+
+    level = package_builder()
+    level.add_import("BlueprintGeneratedClass", "Data_C", outer=level.add_package_import("/Game/Mods/GenericMod/Maps/Data"))
+    level.add_import("BlueprintGeneratedClass", "Data_C", outer=level.add_package_import("/Game/Mods/GenericMod/Data"))
+    level.write(mod / "Maps" / "Cave.umap")
+
+    resolver = PackageResolver(str(mod))
+    resolved = resolver.resolve_all("Cave")
+    package = resolver.load("Maps/Cave")
+    assert resolved[package.imports[1]] is resolver.load(str(mod / "Maps" / "Data.uasset")).exports[0]
+    assert resolved[package.imports[3]] is resolver.load(str(mod / "Data.uasset")).exports[0]
+    assert resolver.load("Data") is None
+    assert resolver.load(str(mod / "Maps" / "Data.uasset")).path == str(mod / "Maps" / "Data.uasset")
+    assert list(resolver.duplicates) == ["Data"]
+
+
+def test_dependency_closure_parses_once(tmp_path, package_builder):
+    resolver = PackageResolver(str(write_mod(tmp_path, package_builder)), max_packages=1)
+
+    dependencies = [os.path.basename(p) for p in resolver.get_dependencies("GenericMod")]
+    assert dependencies == ["PrimalGameData_BP_GenericMod.uasset", "TestGameMode_GenericMod.uasset"]
+    assert resolver.cache.loads == 3
+    assert len(resolver.cache) == 1
+
+
+def test_actor_properties(tmp_path, package_builder):
+    builder = package_builder()
+    builder.add_actor("SpawnZone", "SpawnZone", [
+        ("bOnlyCountLandDinos", "BoolProperty", True),
+        ("MaxNumberOfNPC", "IntProperty", 12),
+        ("DinoSpawnEntries", "ArrayProperty", b"\x00" * 10),
+        ("SpawnLimit", "FloatProperty", 0.5),
+    ])
+    package = ArkPackage(builder.write(tmp_path / "Level.umap"))
+
+    with open(package.path, "rb") as f:
+        actor = UmapActor(package.exports[0], f)
+
+    assert package.get_export_class(package.exports[0]) == "SpawnZone"
+    assert actor.components == {"bOnlyCountLandDinos": True, "MaxNumberOfNPC": 12, "DinoSpawnEntries": None, "SpawnLimit": 0.5}
+    assert [p.size for p in actor.properties] == [1, 4, 10, 4]
+
+
+def test_level_index(tmp_path, package_builder):
+    levels = {}
+    for i, land_only in enumerate((True, False)):
+        builder = package_builder()
+        builder.add_actor("SpawnZone", "SpawnZone", [("bOnlyCountLandDinos", "BoolProperty", land_only)])
+        builder.add_actor("Light", "PointLight", [("Intensity", "FloatProperty", 2.0)])
+        levels[f"Mod{i}"] = [builder.write(tmp_path / f"Level{i}.umap")]
+
+    with LevelIndex(str(tmp_path / "index.db")) as level_index:
+        assert level_index.build(levels) == (2, 0, 0)
+        assert level_index.build(levels) == (0, 2, 0)
+
+        assert level_index.query("SpawnZone", "bOnlyCountLandDinos", 1) == [("Mod0", levels["Mod0"][0], "SpawnZone_0")]
+        assert len(level_index.query("SpawnZone", "bOnlyCountLandDinos")) == 2
+        assert level_index.query("PointLight") == [("Mod0", levels["Mod0"][0], "Light_0"), ("Mod1", levels["Mod1"][0], "Light_0")]
+
+        del levels["Mod1"]
+        assert level_index.build(levels) == (0, 1, 1)
+        assert level_index.query("PointLight") == [("Mod0", levels["Mod0"][0], "Light_0")]
+
+
+def test_lint_levels(tmp_path, package_builder):
+    rules = compile_schema({
+        "SpawnZone": {"sub-components": {
+            "bOnlyCountLandDinos": {"type": "BoolProperty", "values": [True]},
+            "MaxNumberOfNPC": {"min": 0, "max": 10},
+            "SpawnTag": {"min": 0},
+            "NPCSpawnEntries": {"required": True},
+            "Description": "Not checked"
+        }},
+        "PointLight": {"sub-components": {"Intensity": "Not checked"}}
+    })
+    assert list(rules) == ["SpawnZone"]
+    assert rules["SpawnZone"].decode == {"bOnlyCountLandDinos", "MaxNumberOfNPC", "SpawnTag"}
+
+    paths = []
+    for i, (land_only, max_npc) in enumerate(((True, 5), (False, 20))):
+        builder = package_builder()
+        builder.add_actor("SpawnZone", "SpawnZone", [
+            ("bOnlyCountLandDinos", "BoolProperty", land_only),
+            ("MaxNumberOfNPC", "IntProperty", max_npc),
+            ("NPCSpawnEntries", "ArrayProperty", b"\x00" * 4),
+        ] + [("SpawnTag", "NameProperty", "Cave")] * i)
+        paths.append(builder.write(tmp_path / f"Level{i}.umap"))
+
+    assert lint_levels(paths, rules, workers=2) == [
+        (paths[1], "SpawnZone_0", "bOnlyCountLandDinos", "False is not one of [True]"),
+        (paths[1], "SpawnZone_0", "MaxNumberOfNPC", "20 is greater than the maximum of 10"),
+        (paths[1], "SpawnZone_0", "SpawnTag", "'Cave' is not a number"),
+    ]
+
+
+def test_read_strings(tmp_path, package_builder):
+    def fstring(text, utf16):
+        data = (text + "\x00").encode("utf-16-le" if utf16 else "utf-8")
+        return struct.pack("<i", -(len(text) + 1) if utf16 else len(data)) + data
+
+    builder = package_builder()
+    builder.add_actor("Cave", "SpawnZone", [
+        ("Ascii", "StrProperty", fstring("Cave", False)),
+        ("Oil", "StrProperty", fstring("Öl", True)),
+        ("Hole", "StrProperty", fstring("Höhle", True)),
+        # Claims to be far longer than the property holding it
+        ("Broken", "StrProperty", struct.pack("<i", 1 << 30)),
+        ("After", "IntProperty", 3),
+    ])
+    path = builder.write(tmp_path / "Level.umap")
+
+    package = ArkPackage(path)
+    with open(path, "rb") as f:
+        assert UmapActor(package.exports[0], f).components == {"Ascii": "Cave", "Oil": "Öl", "Hole": "Höhle", "Broken": None, "After": 3}
+
+
+def test_diff_levels(tmp_path, package_builder):
+    paths = []
+    for i, land_only in enumerate((True, False)):
+        builder = package_builder()
+        builder.add_actor("SpawnZone", "SpawnZone", [("bOnlyCountLandDinos", "BoolProperty", land_only), ("MaxNumberOfNPC", "IntProperty", 5)])
+        builder.add_actor("Light", "PointLight", [("Intensity", "FloatProperty", 2.0)])
+        builder.add_actor(f"Actor{i}", "Actor", [])
+        paths.append(builder.write(tmp_path / f"Level{i}.umap"))
+
+    changes = [(c.kind, c.name, c.properties) for c in diff_levels(*paths)]
+    assert changes == [
+        ("~", "SpawnZone_0", {("bOnlyCountLandDinos", 0): (True, False)}),
+        ("-", "Actor0_0", {}),
+        ("+", "Actor1_0", {}),
+    ]
+    assert [c.kind for c in diff_levels(None, paths[0])] == ["+", "+", "+"]
+
+
+def test_diff_same_named_subobjects(tmp_path, package_builder):
+    paths = []
+    for i, first_land_only in enumerate((True, False)):
+        builder = package_builder()
+        for actor, land_only in (("VolumeA", first_land_only), ("VolumeB", True)):
+            outer = builder.add_actor(actor, "SpawnZone", [])
+            builder.add_actor("BrushComponent0", "BrushComponent", [("bOnlyCountLandDinos", "BoolProperty", land_only)], outer=outer)
+        paths.append(builder.write(tmp_path / f"Level{i}.umap"))
+
+    assert [(c.kind, c.name, c.properties) for c in diff_levels(*paths)] == [
+        ("~", "VolumeA_0/BrushComponent0_0", {("bOnlyCountLandDinos", 0): (True, False)}),
+    ]
+
+
+def test_patch_and_undo(tmp_path, package_builder):
+    builder = package_builder()
+    builder.add_actor("SpawnZone", "SpawnZone", [("bOnlyCountLandDinos", "BoolProperty", True), ("MaxNumberOfNPC", "IntProperty", 5)])
+    builder.add_actor("Other", "SpawnZone", [("bOnlyCountLandDinos", "BoolProperty", False), ("Tag", "NameProperty", "Cave")])
+    path = builder.write(tmp_path / "Level.umap")
+    journal = str(tmp_path / "journal.jsonl")
+
+    with open(path, "rb") as f:
+        original = f.read()
+
+    assert len(patch_levels([path], "bOnlyCountLandDinos", "false", dry_run=True, journal=journal)) == 1
+    assert not os.path.exists(journal)
+
+    assert [p.actor for p in patch_levels([path], "bOnlyCountLandDinos", "false", journal=journal)] == ["SpawnZone_0"]
+    assert len(patch_levels([path], "MaxNumberOfNPC", 7, class_name="SpawnZone", journal=journal)) == 1
+    assert len(patch_levels([path], "Tag", "SpawnZone", actor="Other_0", journal=journal)) == 1
+    with pytest.raises(ValueError):
+        patch_levels([path], "Tag", "NotAName", journal=journal)
+    with pytest.raises(ValueError):
+        patch_levels([path], "bOnlyCountLandDinos", "ture", journal=journal)
+
+    # A level that cannot hold the value stops the whole run before anything is written
+    other = package_builder()
+    other.add_actor("SpawnZone", "SpawnZone", [("MaxNumberOfNPC", "FloatProperty", 5.0)])
+    other_path = other.write(tmp_path / "Other.umap")
+    with open(other_path, "rb") as f:
+        other_original = f.read()
+    with pytest.raises(ValueError):
+        patch_levels([other_path, path], "MaxNumberOfNPC", "7.5", journal=journal)
+    with open(other_path, "rb") as f:
+        assert f.read() == other_original
+
+    package = ArkPackage(path)
+    with open(path, "rb") as f:
+        assert UmapActor(package.exports[0], f).components == {"bOnlyCountLandDinos": False, "MaxNumberOfNPC": 7}
+        assert UmapActor(package.exports[1], f).components["Tag"] == "SpawnZone"
+
+    # A missing level keeps its patches in the journal until it is back
+    os.rename(path, path + ".moved")
+    undone, skipped = undo_patches(journal)
+    assert (undone, len(skipped)) == ([], 3)
+    os.rename(path + ".moved", path)
+
+    undone, skipped = undo_patches(journal)
+    assert (len(undone), skipped) == (3, [])
+    assert not os.path.exists(journal)
+    with open(path, "rb") as f:
+        assert f.read() == original
+
+
+def test_extract_levels(tmp_path, package_builder):
+    mod = write_mod(tmp_path, package_builder)
+    builder = package_builder()
+    level = builder.add_export("PersistentLevel", b"\x01" * 4)
+    builder.add_export("SpawnZone", b"\x02" * 6, outer=level)
+    builder.add_export("SpawnZone", b"\x03" * 2, outer=level, number=1)
+    builder.write(mod / "Cave.umap")
+    (mod / "Maps").mkdir()
+    builder.write(mod / "Maps" / "Cave.umap")
+
+    output = tmp_path / "extracted"
+    written = extract_levels([str(mod)], str(output), ["SpawnZone*", "*GameData*"], workers=4)
+
+    assert sorted(os.path.relpath(p, output) for p in written) == [
+        os.path.join("GenericMod", "Cave", "PersistentLevel_0", "SpawnZone_0.bin"),
+        os.path.join("GenericMod", "Cave", "PersistentLevel_0", "SpawnZone_1.bin"),
+        os.path.join("GenericMod", "Maps", "Cave", "PersistentLevel_0", "SpawnZone_0.bin"),
+        os.path.join("GenericMod", "Maps", "Cave", "PersistentLevel_0", "SpawnZone_1.bin"),
+        os.path.join("GenericMod", "PrimalGameData_BP_GenericMod", "PrimalGameData_BP_GenericMod_C_0.bin"),
+    ]
+    assert (output / "GenericMod" / "Cave" / "PersistentLevel_0" / "SpawnZone_1.bin").read_bytes() == b"\x03" * 2
+    assert (output / "GenericMod" / "Maps" / "Cave" / "Cave_imports.umap").exists()
+
+
+def test_extract_levels_closes_each_level(tmp_path, package_builder, monkeypatch):
+    monkeypatch.setattr(extract, "MAX_OPEN_LEVELS", 2)
+    builder = package_builder()
+    builder.add_export("SpawnZone", b"\x02" * 6)
+    paths = [builder.write(tmp_path / f"Level{i}.umap") for i in range(8)]
+
+    open_fds = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+    assert len(extract_levels(paths, str(tmp_path / "extracted"), workers=2)) == 8
+    if open_fds is not None:
+        assert len(os.listdir("/proc/self/fd")) == open_fds
+
+
+def test_export_records(tmp_path, package_builder):
+    builder = package_builder()
+    builder.add_actor("SpawnZone", "SpawnZone", [("bOnlyCountLandDinos", "BoolProperty", True)])
+    path = builder.write(tmp_path / "Level.umap")
+
+    out = io.StringIO()
+    count = write_jsonl(iter_records([path]), out)
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert count == len(rows)
+    assert {row["table"] for row in rows} == {"names", "imports", "exports", "properties"}
+    assert [r for r in rows if r["table"] == "properties"] == [{
+        "table": "properties", "level": path, "export": 0, "name": "bOnlyCountLandDinos",
+        "type": "BoolProperty", "array_index": 0, "offset": rows[-1]["offset"], "size": 1, "value": True
+    }]
+
+
+def test_export_columnar(tmp_path, package_builder):
+    np = pytest.importorskip("numpy")
+    builder = package_builder()
+    builder.add_actor("SpawnZone", "SpawnZone", [("bOnlyCountLandDinos", "BoolProperty", True)])
+    path = builder.write(tmp_path / "Level.umap")
+
+    write_columnar(iter_records([path, path]), str(tmp_path / "out"), row_group_size=4)
+
+    parts = sorted(os.listdir(tmp_path / "out" / "names"))
+    names = np.concatenate([np.load(tmp_path / "out" / "names" / part)["name"] for part in parts])
+    assert len(parts) > 1
+    assert list(names) == ArkPackage(path).names * 2